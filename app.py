@@ -1,26 +1,37 @@
 import streamlit as st
 import numpy as np
-import pickle
-from datetime import datetime
-from fpdf import FPDF
-from PIL import Image
-import speech_recognition as sr
-import tempfile
-import requests   # ✅ THIS LINE FIXES THE ERROR
-from tensorflow.keras.models import load_model
+from diseases import DISEASES
+from model_registry import BRAIN_KEY, get_model
+from prediction_cache import prediction_cache, tabular_key, image_key
+from pdf_reports import create_pdf, create_combined_pdf
+from brain_pipeline import open_upload, preprocess_upload, preprocess_cache_stats, expand_uploads, run_brain_batch, score_volume
+import settings
+import storage
+import inference_service
+import panel
+import warmup
+from jobs import brain_jobs, QueueFull, QUEUED, RUNNING, DONE
+import metrics
+from screening import fired_rules, rule_stats
+import thresholds
+import drift
+import audit
+# Heavy libraries (tensorflow, PIL, fpdf, speech_recognition) are imported
+# inside the functions that use them, so Signup/Login/Home reruns never
+# pay for them. Check with: python startup_report.py
+# Opt-in background warm-up; a no-op after the first call in this process
+if settings.WARMUP_ENABLED:
+    warmup.start_warmup()
+
 # ===================== SESSION INIT =====================
 if 'page' not in st.session_state:
     st.session_state['page'] = 'Signup'
-if 'users' not in st.session_state:
-    st.session_state['users'] = {}
 if 'logged_in' not in st.session_state:
     st.session_state['logged_in'] = False
 if 'current_user' not in st.session_state:
     st.session_state['current_user'] = None
 if 'report' not in st.session_state:
     st.session_state['report'] = ""
-if 'appointments' not in st.session_state:
-    st.session_state['appointments'] = {}
 
 # ===================== STYLES =====================
 st.markdown("""
@@ -47,58 +58,17 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# ===================== PDF CREATOR =====================
-def create_pdf(username, disease, result_text, image=None):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, "Multi Disease Diagnostic Report", ln=True, align="C")
-    pdf.ln(5)
-    pdf.set_font("Arial", size=12)
-    login_time = datetime.now().strftime("%d-%m-%Y %I:%M %p")
-    content = f"Username        : {username}\nLogin Time     : {login_time}\nDisease        : {disease}\n\nPrediction Result:\n{result_text}"
-    safe_text = content.encode("latin1","ignore").decode("latin1")
-    pdf.multi_cell(0,8,safe_text)
-    pdf.ln(5)
-    if image:
-        pdf.set_font("Arial", "B", 12)
-        pdf.cell(0, 10, "Uploaded MRI Image:", ln=True)
-        img_path = "temp_brain_image.jpg"
-        image.save(img_path)
-        pdf.image(img_path, x=30, w=150)
-        pdf.ln(10)
-    return pdf.output(dest="S").encode("latin1")
-
-# ===================== MODEL LOADERS =====================
-@st.cache_resource
-def load_pickle_model(path):
-    with open(path,"rb") as f:
-        data = pickle.load(f)
-    if isinstance(data, tuple):
-        model, scaler = data
-    else:
-        model = data['model']
-        scaler = data['scaler']
-    return model, scaler
-
-@st.cache_resource
-def load_brain_model(path="models/brain_tumor_model.h5"):
-    model = load_model(path)
-    return model
-
 # ===================== SIGNUP & LOGIN =====================
 def signup():
     st.title("📝 Signup")
     username = st.text_input("Enter username")
     password = st.text_input("Enter password", type="password")
     if st.button("Signup"):
-        if username in st.session_state['users']:
-            st.error("Username already exists!")
-        elif username=="" or password=="":
+        if username=="" or password=="":
             st.error("Enter valid credentials")
+        elif not storage.create_user(username, password):
+            st.error("Username already exists!")
         else:
-            st.session_state['users'][username] = password
             st.success("Signup successful! Please login.")
             st.session_state['page'] = 'Login'
 
@@ -107,7 +77,7 @@ def login():
     username = st.text_input("Username")
     password = st.text_input("Password", type="password")
     if st.button("Login"):
-        if username in st.session_state['users'] and st.session_state['users'][username]==password:
+        if storage.verify_user(username, password):
             st.session_state['logged_in'] = True
             st.session_state['current_user'] = username
             st.session_state['page'] = 'Home'
@@ -126,48 +96,74 @@ def home_dashboard():
         ("🧠 Brain Tumor","brain_card","Predict Brain Tumor","Brain"),
         ("🟣 Kidney","kidney_card","Predict Kidney Disease","Kidney"),
         ("🟠 Liver","liver_card","Predict Liver Disease","Liver"),
+        ("🩺 Full Panel","panel_card","Heart, Diabetes, Kidney & Liver at once","Panel"),
         ("🎙️ Speech to Text","speech_card","Voice Input","Speech")
     ]
+    if is_admin():
+        cards.append(("📊 Metrics","metrics_card","Stage timings (admin)","Metrics"))
     for title,key,subtitle,page in cards:
         if st.button(title,key=key):
             st.session_state['page'] = page
         st.markdown(f'<div class="card"><div class="card-title">{title}</div><div class="card-subtitle">{subtitle}</div></div>', unsafe_allow_html=True)
     
+    show_readiness()
+
     if st.button("Logout", key="logout_card"):
         st.session_state['logged_in'] = False
         st.session_state['current_user'] = None
         st.session_state['page'] = 'Login'
     st.markdown('</div>', unsafe_allow_html=True)
 
+def show_readiness():
+    status = warmup.readiness()
+    if status:
+        icons = {"ready": "🔥", "loading": "⏳", "pending": "⏳", "failed": "❌"}
+        st.sidebar.caption("Models: " + "  ".join(f"{icons[s['state']]} {key}" for key, s in status.items()))
+
 # ===================== DISEASE INPUTS =====================
 # ===================== GENERIC DISEASE PAGE =====================
-def disease_page(disease_name, model_loader, input_func):
+def disease_page(disease_key, input_func):
+    disease_name = DISEASES[disease_key]["label"]
     st.header(f"🧪 {disease_name} Prediction")
 
     inputs = input_func()
 
     if st.button("🔍 Predict"):
         try:
-            model, scaler = model_loader()
-
-            X = np.array(inputs).reshape(1, -1)
-            X_scaled = scaler.transform(X)
-
-            prediction = model.predict(X_scaled)[0]
-
-            if prediction == 1:
+            with metrics.stage(disease_key, "model_load"):
+                loaded = get_model(disease_key)
+            cache_key = tabular_key(disease_key, f"{loaded.version}:{thresholds.version_tag(disease_key)}", inputs)
+
+            drift.observe(disease_key, inputs)
+            # Red-flag values short-circuit the model (rules in diseases.py)
+            fired = fired_rules(disease_key, inputs)
+            if not fired:
+                # Coalesced with other sessions' requests by the inference service
+                with metrics.stage(disease_key, "predict"):
+                    prediction = prediction_cache.get_or_compute(
+                        cache_key, lambda: inference_service.predict_tabular(disease_key, inputs)
+                    )
+
+            if fired:
+                result_text = f"⚠️ {disease_name} Detected (Rule-Based Alert: {'; '.join(fired)})"
+                
+            elif thresholds.is_positive(disease_key, prediction):
                 result_text = f"⚠️ {disease_name} Detected"
                 
             else:
                 result_text = f"✅ No {disease_name} Detected"
                 
 
+            username = st.session_state['current_user']
+            audit.record(username, disease_key, inputs, result_text, loaded.version,
+                         prediction=None if fired else prediction, rules=fired)
+
             # PDF
-            pdf_bytes = create_pdf(
-                username=st.session_state['current_user'],
-                disease=disease_name,
-                result_text=result_text
-            )
+            with metrics.stage(disease_key, "create_pdf"):
+                pdf_bytes = prediction_cache.get_or_compute(
+                    cache_key + ("pdf", username),
+                    lambda: create_pdf(username=username, disease=disease_name, result_text=result_text)
+                )
             st.download_button(
                 "📄 Download PDF Report",
                 pdf_bytes,
@@ -176,15 +172,26 @@ def disease_page(disease_name, model_loader, input_func):
             )
 
             # Appointment + Hospitals
-            appointment_booking(disease_name)
-            show_hospitals(disease_name)
+            with metrics.stage(disease_key, "appointments"):
+                appointment_booking(disease_name)
+                show_hospitals(disease_name)
 
         except Exception as e:
             st.error("Prediction failed ❌")
             st.code(str(e))
 
+    show_cache_stats()
     st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
 
+def show_cache_stats():
+    stats = prediction_cache.stats()
+    st.sidebar.caption(f"⚡ Prediction cache: {stats['hits']} hits / {stats['misses']} misses "
+                       f"({stats['size']}/{stats['max_size']} entries)")
+    stats = preprocess_cache_stats()
+    if stats['hits'] or stats['misses']:
+        st.sidebar.caption(f"🖼️ MRI preprocess cache: {stats['hits']} hits / {stats['misses']} misses "
+                           f"({stats['size']}/{stats['max_size']} entries)")
+
 def heart_inputs():
     age = st.number_input("Age",0,120,52)
     sex = st.selectbox("Sex (0=F,1=M)",[0,1])
@@ -239,24 +246,117 @@ def liver_inputs():
     ag_ratio = st.number_input("Albumin/Globulin Ratio",0.0,3.0,0.9)
     return [age,gender_val,total_bilirubin,direct_bilirubin,alk_phos,alt,ast,total_proteins,albumin,ag_ratio]
 
-# ===================== BRAIN TUMOR PREDICTION PAGE =====================
-@st.cache_resource
-@st.cache_resource
-def load_brain_model():
-    FILE_ID = "1r7Kmf14ZGKQK3GSTk3nxPxfAyGpg2m_b"
-    URL = f"https://drive.google.com/uc?id={FILE_ID}"
-
-    response = requests.get(URL)
-    with open("brain_tumor_model.h5", "wb") as f:
-        f.write(response.content)
+# ===================== FULL PANEL =====================
+def panel_inputs():
+    # Union of the four forms above; shared fields are asked once
+    # (see panel.PANEL_FIELDS for which model uses what).
+    v = {}
+    st.subheader("Shared")
+    c1, c2 = st.columns(2)
+    v['age'] = c1.number_input("Age",1,120,45)
+    v['sex'] = 1 if c2.selectbox("Sex",["Male","Female"])=="Male" else 0
+    v['diastolic_bp'] = c1.number_input("Diastolic BP",0,200,80)
+    v['glucose'] = c2.number_input("Glucose",0,500,120)
+    with st.expander("❤️ Heart", expanded=True):
+        c1, c2 = st.columns(2)
+        v['chest_pain'] = c1.number_input("Chest Pain Type",0,3,0)
+        v['resting_bp'] = c2.number_input("Resting (systolic) BP",80,200,120)
+        v['cholesterol'] = c1.number_input("Cholesterol",100,600,240)
+        v['fbs'] = c2.selectbox("FBS > 120",[0,1])
+        v['rest_ecg'] = c1.number_input("Rest ECG",0,2,1)
+        v['max_hr'] = c2.number_input("Max HR",60,250,150)
+        v['exercise_angina'] = c1.selectbox("Exercise angina",[0,1])
+        v['st_depression'] = c2.number_input("ST Depression",0.0,10.0,1.2)
+        v['st_slope'] = c1.number_input("Slope ST",0,2,1)
+        v['vessels'] = c2.number_input("Vessels colored",0,3,0)
+        v['thal'] = c1.number_input("Thalassemia",1,3,2)
+    with st.expander("🩸 Diabetes", expanded=True):
+        c1, c2 = st.columns(2)
+        v['pregnancies'] = c1.number_input("Pregnancies",0,20,2)
+        v['skin_thickness'] = c2.number_input("Skin Thickness",0,100,20)
+        v['insulin'] = c1.number_input("Insulin",0,900,85)
+        v['bmi'] = c2.number_input("BMI",0.0,70.0,28.5)
+        v['dpf'] = c1.number_input("DPF",0.0,3.0,0.5)
+    with st.expander("🟣 Kidney", expanded=True):
+        c1, c2 = st.columns(2)
+        v['specific_gravity'] = c1.number_input("Specific Gravity",1.0,1.05,1.02)
+        v['urine_albumin'] = c2.number_input("Urine Albumin (0-5)",0,5,0)
+        v['urine_sugar'] = c1.number_input("Urine Sugar (0-5)",0,5,0)
+        v['blood_urea'] = c2.number_input("Blood Urea",0,200,25)
+        v['serum_creatinine'] = c1.number_input("Serum Creatinine",0.0,20.0,1.0)
+        v['hemoglobin'] = c2.number_input("Hemoglobin",0.0,20.0,15.2)
+        v['pcv'] = c1.number_input("Packed Cell Volume",0,60,44)
+    with st.expander("🟠 Liver", expanded=True):
+        c1, c2 = st.columns(2)
+        v['total_bilirubin'] = c1.number_input("Total Bilirubin",0.0,10.0,1.3)
+        v['direct_bilirubin'] = c2.number_input("Direct Bilirubin",0.0,5.0,0.4)
+        v['alk_phos'] = c1.number_input("Alkaline Phosphotase",50,2000,210)
+        v['alt'] = c2.number_input("ALT",1,2000,35)
+        v['ast'] = c1.number_input("AST",1,2000,40)
+        v['total_proteins'] = c2.number_input("Total Proteins",1.0,10.0,6.8)
+        v['serum_albumin'] = c1.number_input("Serum Albumin",1.0,6.0,3.1)
+        v['ag_ratio'] = c2.number_input("Albumin/Globulin Ratio",0.0,3.0,0.9)
+    return v
+
+def panel_page():
+    st.header("🩺 Full Panel")
+    values = panel_inputs()
+
+    if st.button("🔍 Predict All"):
+        try:
+            # All four models scored concurrently in this one rerun
+            with metrics.stage("panel", "predict"):
+                results, timing = panel.run_panel(values)
+
+            username = st.session_state['current_user']
+            combined = []
+            for key, result in results.items():
+                text = panel.result_text(key, result)
+                audit.record(username, key, panel.disease_inputs(values)[key], text, get_model(key).version,
+                             prediction=None if result['fired'] else result['prediction'], rules=result['fired'], source="panel")
+                combined.append((DISEASES[key]["label"], text))
+                if text.startswith("⚠️"):
+                    st.error(text)
+                else:
+                    st.success(text)
+            sequential = sum(r["seconds"] for r in results.values())
+            st.caption(f"⏱️ {timing['wall_seconds'] * 1000:.1f} ms for all four models "
+                       f"({sequential * 1000:.1f} ms if scored one after another)")
+
+            with metrics.stage("panel", "create_pdf"):
+                pdf_bytes = create_combined_pdf(username=username, results=combined)
+            st.download_button("📄 Download Combined Report", pdf_bytes, "Full_Panel_Report.pdf", "application/pdf")
+
+            with metrics.stage("panel", "appointments"):
+                detected = [label for label, text in combined if text.startswith("⚠️")]
+                # One specialist suggestion only makes sense for a single finding
+                appointment_booking(detected[0] if len(detected) == 1 else "Full Panel")
+                show_hospitals(detected[0] if len(detected) == 1 else "Full Panel")
 
-    return load_model("brain_tumor_model.h5")
+        except Exception as e:
+            st.error("Prediction failed ❌")
+            st.code(str(e))
 
+    show_cache_stats()
+    st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
 
+# ===================== BRAIN TUMOR PREDICTION PAGE =====================
 def brain_tumor_page():
     st.header("🧠 Brain Tumor Detection")
 
-    model = load_brain_model()
+    with metrics.stage(BRAIN_KEY, "model_load"):
+        loaded = get_model(BRAIN_KEY)
+    model = loaded.model
+    st.caption(f"Inference backend: {settings.BRAIN_BACKEND}")
+
+    mode = st.radio("Mode", ["Single image", "Batch (multiple files / ZIP)", "Volume (NPY / multi-frame TIFF)"], horizontal=True)
+    if mode != "Single image":
+        if mode.startswith("Volume"):
+            brain_volume_section(model, loaded.version)
+        else:
+            brain_batch_section(model, loaded.version)
+        st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
+        return
 
     uploaded_file = st.file_uploader(
         "Upload Brain MRI Image",
@@ -264,57 +364,171 @@ def brain_tumor_page():
     )
 
     if uploaded_file is not None:
-        image = Image.open(uploaded_file).convert("RGB")
+        data = uploaded_file.getvalue()
+        # Preview (also embedded in the PDF) is draft-decoded, never full size
+        image = open_upload(data, (settings.BRAIN_PREVIEW_PX, settings.BRAIN_PREVIEW_PX))
         st.image(image, caption="Uploaded MRI", use_column_width=True)
 
         input_shape = model.input_shape[1:]
-
-        # Preprocess
-        if len(input_shape) == 1:
-            side = int(np.sqrt(input_shape[0] / 3))
-            img = image.resize((side, side))
-            img_array = np.array(img) / 255.0
-            img_array = img_array.flatten().reshape(1, -1)
-
-        elif input_shape[-1] == 1:
-            img = image.resize((input_shape[0], input_shape[1])).convert("L")
-            img_array = np.array(img) / 255.0
-            img_array = img_array.reshape(1, input_shape[0], input_shape[1], 1)
-
-        else:
-            img = image.resize((input_shape[0], input_shape[1]))
-            img_array = np.array(img) / 255.0
-            img_array = img_array.reshape(1, input_shape[0], input_shape[1], 3)
+        # The threshold tag keys the cached PDF's verdict, like the tabular pages
+        cache_key = image_key(data, f"{loaded.version}:{thresholds.version_tag(BRAIN_KEY)}")
+        username = st.session_state['current_user']
 
         if st.button("🔍 Predict Brain Tumor"):
-            prediction = model.predict(img_array)
-
-            if prediction[0][0] > 0.5:
-                result_text = "⚠️ Brain Tumor Detected"
-                st.error(result_text)
+            # Runs on the brain job pool; this script thread stays free
+            try:
+                job_id = brain_jobs.submit(brain_job, data, input_shape, cache_key, username, image, loaded.version)
+                st.session_state['brain_job'] = {'id': job_id, 'cache_key': cache_key}
+            except QueueFull:
+                st.warning("⏳ The server is busy with other scans, please try again in a moment")
+
+        job = st.session_state.get('brain_job')
+        if job and job['cache_key'] == cache_key:
+            status = brain_jobs.status(job['id'])
+            if status['state'] in (QUEUED, RUNNING):
+                brain_job_progress(job['id'])
+            elif status['state'] == DONE:
+                score, result_text, pdf_bytes = status['result']
+                if thresholds.brain_detected(score):
+                    st.error(result_text)
+                else:
+                    st.success(result_text)
+                st.caption(f"⏱️ {status['seconds']:.2f}s (queued {status['queued_seconds']:.2f}s)")
+
+                st.download_button(
+                    "📄 Download Brain Tumor Report",
+                    pdf_bytes,
+                    file_name="Brain_Tumor_Report.pdf",
+                    mime="application/pdf"
+                )
+
+                with metrics.stage(BRAIN_KEY, "appointments"):
+                    appointment_booking("Brain Tumor")
+                    show_hospitals("Brain Tumor")
             else:
-                result_text = "✅ No Brain Tumor Detected"
-                st.success(result_text)
+                st.error("Prediction failed ❌")
+                st.code(status.get('error') or "Result expired, please predict again")
 
-            # PDF
-            pdf_bytes = create_pdf(
-                username=st.session_state['current_user'],
-                disease="Brain Tumor",
-                result_text=result_text,
-                image=image
-            )
+    show_cache_stats()
+    st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
 
-            st.download_button(
-                "📄 Download Brain Tumor Report",
-                pdf_bytes,
-                file_name="Brain_Tumor_Report.pdf",
-                mime="application/pdf"
+def brain_job(progress, data, input_shape, cache_key, username, image, model_version):
+    # Background thread: no st.* calls in here.
+    progress(0.1, "Preprocessing scan")
+    with metrics.stage(BRAIN_KEY, "preprocess"):
+        img_array = preprocess_upload(data, input_shape)[np.newaxis]
+    progress(0.3, "Running the model")
+    with metrics.stage(BRAIN_KEY, "predict"):
+        score = prediction_cache.get_or_compute(cache_key, lambda: inference_service.predict_brain(img_array))
+    if thresholds.brain_detected(score):
+        result_text = "⚠️ Brain Tumor Detected"
+    else:
+        result_text = "✅ No Brain Tumor Detected"
+    audit.record(username, BRAIN_KEY, {"image_sha256": cache_key[2]}, result_text, model_version, score=score)
+    progress(0.8, "Rendering PDF report")
+    with metrics.stage(BRAIN_KEY, "create_pdf"):
+        pdf_bytes = prediction_cache.get_or_compute(
+            cache_key + ("pdf", username),
+            lambda: create_pdf(username=username, disease="Brain Tumor", result_text=result_text, image=image)
+        )
+    return score, result_text, pdf_bytes
+
+@st.fragment(run_every=0.5)
+def brain_job_progress(job_id):
+    # Only this block reruns while the job is pending; a full rerun once it
+    # finishes draws the result, PDF and appointment widgets.
+    status = brain_jobs.status(job_id)
+    if status['state'] not in (QUEUED, RUNNING):
+        st.rerun()
+    st.progress(status['progress'], text=f"⏳ {status['message']} ({status['seconds']:.1f}s)")
+
+def brain_batch_section(model, model_version):
+    import hashlib
+    import pandas as pd
+    uploaded_files = st.file_uploader(
+        "Upload MRI slices or a ZIP of a study",
+        type=["jpg", "jpeg", "png", "zip"],
+        accept_multiple_files=True
+    )
+    batch_size = st.number_input("Batch size", 1, 512, settings.BRAIN_BATCH_SIZE)
+
+    if uploaded_files and st.button("🔍 Predict All"):
+        items = expand_uploads(uploaded_files)
+        if not items:
+            st.warning("No JPG/PNG images found in the upload")
+            return
+        with st.spinner(f"Scoring {len(items)} images..."):
+            results, errors, timing = run_brain_batch(model, items, batch_size=int(batch_size))
+
+        digests = {name: hashlib.sha256(data).hexdigest() for name, data in items}
+        username = st.session_state['current_user']
+        for r in results:
+            audit.record(username, BRAIN_KEY, {"file": r["file"], "image_sha256": digests[r["file"]]}, r["result"],
+                         model_version, score=r["score"], source="batch")
+
+        detected = sum(r["result"] == "Tumor Detected" for r in results)
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Images", timing["images"])
+        c2.metric("Tumor detected", detected)
+        c3.metric("Total time", f"{timing['total_seconds']:.2f} s")
+        c4.metric("Throughput", f"{timing['images_per_sec']:.1f} img/s")
+        st.caption(f"Preprocess {timing['preprocess_seconds']:.2f} s · Predict {timing['predict_seconds']:.2f} s")
+
+        df = pd.DataFrame(results)
+        st.dataframe(df, use_container_width=True)
+        st.download_button("📄 Download Results CSV", df.to_csv(index=False), "Brain_Tumor_Batch_Results.csv", "text/csv")
+        if errors:
+            st.warning(f"{len(errors)} file(s) could not be read")
+            st.dataframe(pd.DataFrame(errors), use_container_width=True)
+
+def brain_volume_section(model, model_version):
+    import os
+    import tempfile
+    import pandas as pd
+    uploaded = st.file_uploader("Upload a multi-slice study", type=["npy", "tif", "tiff"])
+    if uploaded is None or not st.button("🔍 Predict Study"):
+        return
+
+    # Spooled to disk so the volume is memory-mapped / read frame by frame
+    suffix = os.path.splitext(uploaded.name)[1].lower()
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        for chunk in iter(lambda: uploaded.read(1 << 20), b""):
+            tmp.write(chunk)
+    try:
+        bar = st.progress(0.0, text="Scoring slices...")
+        with metrics.stage(BRAIN_KEY, "volume"):
+            results, summary = score_volume(
+                model, tmp.name, progress=lambda done, total: bar.progress(done / total, text=f"Scored {done}/{total} slices")
             )
-
-            appointment_booking("Brain Tumor")
-            show_hospitals("Brain Tumor")
-
-    st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
+    except Exception as e:
+        st.error("Could not read the study ❌")
+        st.code(str(e))
+        return
+    finally:
+        os.remove(tmp.name)
+    if summary['slices'] == 0:
+        st.warning("The study contains no slices")
+        return
+
+    result_text = "⚠️ Brain Tumor Detected" if summary['detected'] else "✅ No Brain Tumor Detected"
+    audit.record(st.session_state['current_user'], BRAIN_KEY, {"study": uploaded.name, "slices": summary['slices']},
+                 result_text, model_version, score=summary['max_score'], detected_slices=summary['detected_slices'])
+    if summary['detected']:
+        st.error(f"{result_text} ({summary['detected_slices']} of {summary['slices']} slices)")
+    else:
+        st.success(result_text)
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Slices", summary['slices'])
+    c2.metric("Max score", f"{summary['max_score']:.3f}")
+    c3.metric("Mean score", f"{summary['mean_score']:.3f}")
+    c4.metric("Throughput", f"{summary['slices_per_sec']:.1f} slices/s")
+    st.caption(f"Most suspicious slices: {', '.join(map(str, summary['top_slices']))} · "
+               f"batch buffer {summary['batch_mb']:.1f} MB")
+
+    df = pd.DataFrame(results)
+    st.line_chart(df.set_index("slice")["score"])
+    st.dataframe(df, use_container_width=True)
+    st.download_button("📄 Download Slice Scores CSV", df.to_csv(index=False), "Brain_Tumor_Study_Scores.csv", "text/csv")
 
 # ===================== APPOINTMENTS =====================
 def appointment_booking(disease):
@@ -332,14 +546,16 @@ def appointment_booking(disease):
     st.markdown(f"🔗 **Online Consultation:** [Book Appointment]({link})")
 
     username = st.session_state['current_user']
-    if username not in st.session_state['appointments']:
-        st.session_state['appointments'][username] = []
     if st.button("✅ Save Appointment"):
-        st.session_state['appointments'][username].append({"disease":disease,"doctor":doctor,"link":link,"time":str(datetime.now())})
+        storage.add_appointment(username, disease, doctor, link)
         st.success("Appointment added to history!")
-    if st.session_state['appointments'].get(username):
+    total = storage.count_appointments(username)
+    if total:
         st.subheader("📋 Appointment History")
-        for appt in st.session_state['appointments'][username]:
+        page_size = settings.APPOINTMENTS_PAGE_SIZE
+        pages = (total + page_size - 1) // page_size
+        page = st.number_input(f"Page (1-{pages})", 1, pages, 1, key="appointments_page") if pages > 1 else 1
+        for appt in storage.get_appointments(username, page, page_size):
             st.write(f"- **{appt['disease']}** with {appt['doctor']} ➡️ [Link]({appt['link']}) (Saved: {appt['time']})")
 def show_hospitals(disease):
     st.subheader("🏥 Nearby Hospitals / Clinics")
@@ -358,21 +574,72 @@ def speech_to_text_page():
     st.header("🎙️ Speech to Text")
     audio_file = st.file_uploader("Upload WAV file", type=["wav"])
     if audio_file:
-        recognizer = sr.Recognizer()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-            f.write(audio_file.read())
-            file_path = f.name
-        with sr.AudioFile(file_path) as source:
-            audio = recognizer.record(source)
+        import speech_recognition as sr
+        from speech_pipeline import transcribe_stream
+        st.caption(f"Engine: {settings.SPEECH_BACKEND}")
+        progress = st.progress(0.0)
+        partial = st.empty()
+        text = ""
         try:
-            text = recognizer.recognize_google(audio)
+            # Long recordings are chunked and transcribed in parallel;
+            # text appears chunk by chunk, in order.
+            for done, total, text in transcribe_stream(audio_file.getvalue()):
+                progress.progress(done / total, text=f"Transcribed {done}/{total} chunks")
+                partial.markdown(text)
+            partial.empty()
             st.success("Recognized Text:")
             st.text_area("Result", text, height=150)
         except sr.UnknownValueError:
+            partial.empty()
             st.error("Could not understand audio")
         except sr.RequestError as e:
+            partial.empty()
             st.error(f"API Error: {e}")
 
+# ===================== METRICS (ADMIN) =====================
+def is_admin():
+    return settings.METRICS_ENABLED and st.session_state.get('current_user') in settings.ADMIN_USERS
+
+def metrics_page():
+    import pandas as pd
+    st.header("📊 Stage Timings")
+    if not is_admin():
+        st.error("Admins only (MDDS_ADMIN_USERS)")
+        st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
+        return
+    rows = metrics.snapshot()
+    if not rows:
+        st.info("No predictions timed yet in this server process")
+    else:
+        table = pd.DataFrame(rows).drop(columns=["buckets"])
+        st.dataframe(table[["disease", "stage", "count", "p50_ms", "p95_ms", "p99_ms", "sum_seconds"]])
+        st.download_button("⬇️ Prometheus text", metrics.prometheus_text(), "mdds_metrics.txt", "text/plain")
+    for key, entry in thresholds.stale_thresholds().items():
+        st.warning(f"⚠️ {key}: threshold {entry['threshold']:g} was chosen on model {entry.get('model_version')}, "
+                   f"now serving {get_model(key).version}; re-run evaluate.py --save-threshold")
+    drifted = [dict(row, disease=key) for key, rows in drift.live_report().items() for row in rows if row['alert']]
+    if drifted:
+        st.subheader("⚠️ Input drift")
+        st.dataframe(pd.DataFrame(drifted)[["disease", "feature", "count", "mean", "ref_mean", "mean_shift_sd", "std_ratio", "psi"]])
+    rules = rule_stats.report()
+    if rules:
+        st.subheader("Rule screening hits")
+        st.dataframe(pd.DataFrame(rules))
+    if settings.METRICS_PORT:
+        st.caption(f"Scrape endpoint: http://<host>:{settings.METRICS_PORT}/metrics")
+    jobs = brain_jobs.stats()
+    st.caption(f"🧠 Brain jobs: {jobs['running']} running, {jobs['queued']} queued "
+               f"(limit {jobs['max_pending']}), {jobs['rejected']} turned away")
+    log = audit.audit_log.stats()
+    st.caption(f"🧾 Audit log: {log['written']} written, {log['queued']} waiting, {log['rotations']} rotations, "
+               f"{log['dropped']} dropped, {log['errors']} write errors")
+    service = inference_service.service_stats()
+    if service:
+        st.subheader("Micro-batching queues")
+        st.dataframe(pd.DataFrame(service).T)
+    show_cache_stats()
+    st.button("⬅️ Back", on_click=lambda: st.session_state.update({'page': 'Home'}))
+
 # ===================== MAIN =====================
 if st.session_state['page'] == 'Signup':
     signup()
@@ -381,14 +648,18 @@ elif st.session_state['page'] == 'Login':
 elif st.session_state['page'] == 'Home':
     home_dashboard()
 elif st.session_state['page']=="Heart":
-    disease_page("Heart Disease", lambda: load_pickle_model("models/heart_model.pkl"), heart_inputs)
+    disease_page("heart", heart_inputs)
 elif st.session_state['page']=="Diabetes":
-    disease_page("Diabetes", lambda: load_pickle_model("models/diabetes_model.pkl"), diabetes_inputs)
+    disease_page("diabetes", diabetes_inputs)
 elif st.session_state['page']=="Kidney":
-    disease_page("Kidney Disease", lambda: load_pickle_model("models/kidney_10f_model.pkl"), kidney_inputs)
+    disease_page("kidney", kidney_inputs)
 elif st.session_state['page']=="Liver":
-    disease_page("Liver Disease", lambda: load_pickle_model("models/liver_model.pkl"), liver_inputs)
+    disease_page("liver", liver_inputs)
+elif st.session_state['page']=="Panel":
+    panel_page()
 elif st.session_state['page'] == "Brain":
     brain_tumor_page()
 elif st.session_state['page']=="Speech":
     speech_to_text_page()
+elif st.session_state['page']=="Metrics":
+    metrics_page()
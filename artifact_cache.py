@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import settings
+
+# ===================== MODEL ARTIFACT CACHE =====================
+# Downloads are streamed to a temp file in the cache directory, hashed while
+# they are written and then renamed into place, so a crashed or concurrent
+# download can never leave a half-written model behind. manifest.json keeps
+# the SHA-256 and size of every artifact for the "already present" fast path.
+MANIFEST_NAME = "manifest.json"
+CHUNK_SIZE = 1 << 20
+
+_lock = threading.Lock()
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_manifest(cache_dir=None):
+    path = os.path.join(cache_dir or settings.MODEL_CACHE_DIR, MANIFEST_NAME)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _record(cache_dir, name, entry):
+    manifest = read_manifest(cache_dir)
+    manifest[name] = entry
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=MANIFEST_NAME, suffix=".part")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(cache_dir, MANIFEST_NAME))
+
+
+def _download(url, dest_dir, name, timeout):
+    import requests
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix=name, suffix=".part")
+    try:
+        # The file object owns fd first, so a failed request still closes it.
+        with os.fdopen(fd, "wb") as f, requests.get(url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            for block in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(block)
+                digest.update(block)
+                size += len(block)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest(), size
+
+
+def fetch_artifact(name, url, sha256=None, cache_dir=None, timeout=60):
+    cache_dir = cache_dir or settings.MODEL_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, name)
+
+    with _lock:
+        entry = read_manifest(cache_dir).get(name)
+        if os.path.exists(path):
+            # Fast path: trust the manifest instead of re-hashing a large file
+            # on every cold start.
+            if entry and os.path.getsize(path) == entry["size"] and (not sha256 or entry["sha256"] == sha256):
+                return path
+            # File placed by hand (or manifest lost): adopt it if it checks out.
+            actual = sha256_file(path)
+            if not sha256 or actual == sha256:
+                _record(cache_dir, name, {"sha256": actual, "size": os.path.getsize(path),
+                                          "source": "local", "fetched_at": time.time()})
+                return path
+
+        tmp_path, actual, size = _download(url, cache_dir, name, timeout)
+        if sha256 and actual != sha256:
+            os.remove(tmp_path)
+            raise ValueError(f"Checksum mismatch for {name}: expected {sha256}, got {actual}")
+        os.replace(tmp_path, path)
+        _record(cache_dir, name, {"sha256": actual, "size": size, "source": url, "fetched_at": time.time()})
+    return path
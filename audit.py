@@ -0,0 +1,252 @@
+import argparse
+import atexit
+import glob
+import gzip
+import heapq
+import json
+import os
+import queue
+import shutil
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+import settings
+
+# ===================== PREDICTION AUDIT LOG =====================
+# record() only puts the entry on an in-memory queue; one writer thread per
+# process appends the queued entries in batches as JSON lines to
+# MDDS_AUDIT_DIR/audit-<host>-<pid>.jsonl and fsyncs at most every
+# MDDS_AUDIT_FSYNC_SECONDS. Past MDDS_AUDIT_MAX_BYTES the file is renamed and
+# gzipped in the background. The queue is bounded: if the writer falls that
+# far behind (disk full, permissions), record() waits PUT_TIMEOUT_SECONDS and
+# then drops the entry with a message rather than hang a Streamlit thread.
+# The writer stamps "ts" as it encodes, so each file is in timestamp order
+# even when sessions enqueue concurrently. read_audit() streams every file
+# (plain and .gz) in time order with optional filters:
+#   python audit.py --disease heart --since 2026-10-01 --user alice
+PUT_TIMEOUT_SECONDS = 2.0
+
+
+class AuditLog:
+    def __init__(self, directory, max_bytes, fsync_seconds, batch_size, queue_limit):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fsync_seconds = fsync_seconds
+        self.batch_size = batch_size
+        self._queue = queue.Queue(queue_limit)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.rotations = 0
+        self.dropped = 0
+        self.errors = 0
+        self._last_ts = 0.0
+
+    def path(self):
+        return os.path.join(self.directory, f"audit-{socket.gethostname()}-{os.getpid()}.jsonl")
+
+    def record(self, entry):
+        if self._thread is None or not self._thread.is_alive():
+            self._start()
+        try:
+            self._queue.put(entry, timeout=PUT_TIMEOUT_SECONDS)
+        except queue.Full:
+            # Writer stuck (disk full, permissions): don't hang the page.
+            self.dropped += 1
+            print(f"audit log: queue full, entry dropped ({self.dropped} so far)", file=sys.stderr)
+
+    def flush(self, timeout=5.0):
+        # Blocks until everything queued so far is written and fsynced.
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def stats(self):
+        return {"queued": self._queue.qsize(), "written": self.written, "rotations": self.rotations,
+                "dropped": self.dropped, "errors": self.errors}
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                if self._thread is None:
+                    atexit.register(self.flush)
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.fsync_seconds)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        # Unbuffered appends: after a failed write, `pending` holds exactly
+        # the bytes not yet on disk and the same batch is retried, without
+        # taking more from the queue, until the disk accepts it again.
+        fd, pending, count, waiters = None, b"", 0, []
+        last_sync, dirty, failing = time.monotonic(), False, False
+        while True:
+            if not pending:
+                batch = self._next_batch()
+                waiters += [item for item in batch if isinstance(item, threading.Event)]
+                lines = []
+                for entry in batch:
+                    if isinstance(entry, threading.Event):
+                        continue
+                    try:
+                        lines.append(self._encode(entry))
+                    except Exception as e:
+                        self.dropped += 1
+                        print(f"audit log: unencodable entry dropped: {e}", file=sys.stderr)
+                pending, count = b"".join(lines), len(lines)
+            try:
+                if fd is None:
+                    os.makedirs(self.directory, exist_ok=True)
+                    fd = os.open(self.path(), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                while pending:
+                    pending = pending[os.write(fd, pending):]
+                if count:
+                    self.written += count
+                    count, dirty = 0, True
+                if dirty and (waiters or time.monotonic() - last_sync >= self.fsync_seconds):
+                    os.fsync(fd)
+                    last_sync, dirty = time.monotonic(), False
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+                if os.fstat(fd).st_size >= self.max_bytes:
+                    os.close(fd)
+                    fd = None
+                    self._rotate()
+                if failing:
+                    failing = False
+                    print("audit log: writing again", file=sys.stderr)
+            except Exception as e:
+                self.errors += 1
+                if not failing:
+                    failing = True
+                    print(f"audit log: write to {self.path()} failed, retrying: {e}", file=sys.stderr)
+                if fd is not None:
+                    try:
+                        os.close(fd)
+                    except OSError:
+                        pass
+                    fd = None
+                time.sleep(1)
+
+    def _encode(self, entry):
+        # Never earlier than the previous line, even if the clock steps back.
+        self._last_ts = max(time.time(), self._last_ts)
+        stamped = {"ts": self._last_ts, "time": datetime.fromtimestamp(self._last_ts).isoformat(timespec="milliseconds"), **entry}
+        return json.dumps(stamped, default=_json_default, separators=(",", ":")).encode("utf-8") + b"\n"
+
+    def _rotate(self):
+        self.rotations += 1
+        path = self.path()
+        rotated = f"{path[:-len('.jsonl')]}-{time.strftime('%Y%m%d-%H%M%S')}-{self.rotations}.jsonl"
+        os.replace(path, rotated)
+        threading.Thread(target=_compress, args=(rotated,), name="audit-compress", daemon=True).start()
+
+
+def _compress(path):
+    with open(path, "rb") as src, gzip.open(f"{path}.gz.part", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    stat = os.stat(path)
+    # Keep the last-write time: read_audit() skips files older than --since.
+    os.utime(f"{path}.gz.part", (stat.st_atime, stat.st_mtime))
+    os.replace(f"{path}.gz.part", f"{path}.gz")
+    os.remove(path)
+
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+audit_log = AuditLog(settings.AUDIT_DIR, settings.AUDIT_MAX_BYTES, settings.AUDIT_FSYNC_SECONDS,
+                     settings.AUDIT_BATCH_SIZE, settings.AUDIT_QUEUE_LIMIT)
+
+
+def record(user, disease, inputs, output, model_version=None, **extra):
+    if settings.AUDIT_ENABLED:
+        audit_log.record({"user": user, "disease": disease, "inputs": inputs, "output": output,
+                          "model_version": model_version, **extra})
+
+
+# ===================== READER =====================
+def log_files(directory=None):
+    directory = directory or settings.AUDIT_DIR
+    return sorted(glob.glob(os.path.join(directory, "audit-*.jsonl")) + glob.glob(os.path.join(directory, "audit-*.jsonl.gz")))
+
+
+def _read_file(path, since, until, disease, user):
+    if since is not None and os.path.getmtime(path) < since:
+        return  # last write was before the window
+    # Cheap substring check before parsing; entries are compact JSON.
+    needles = [f'"{field}":{json.dumps(value)}' for field, value in (("disease", disease), ("user", user)) if value is not None]
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if any(needle not in line for needle in needles):
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line after a crash
+            if until is not None and entry["ts"] > until:
+                return  # each file is in time order
+            if since is not None and entry["ts"] < since:
+                continue
+            if (disease is None or entry["disease"] == disease) and (user is None or entry["user"] == user):
+                yield entry
+
+
+def read_audit(directory=None, since=None, until=None, disease=None, user=None):
+    # since / until: unix timestamps. Merges all files lazily by timestamp.
+    streams = [_read_file(path, since, until, disease, user) for path in log_files(directory)]
+    return heapq.merge(*streams, key=lambda entry: entry["ts"])
+
+
+def _timestamp(text):
+    return datetime.fromisoformat(text).timestamp() if text else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream the prediction audit log as JSON lines.")
+    parser.add_argument("--dir", help=f"log directory (default {settings.AUDIT_DIR})")
+    parser.add_argument("--since", help="ISO date/time, e.g. 2026-10-01 or 2026-10-01T09:30")
+    parser.add_argument("--until", help="ISO date/time")
+    parser.add_argument("--disease")
+    parser.add_argument("--user")
+    parser.add_argument("--count", action="store_true", help="print only the number of matching entries")
+    args = parser.parse_args(argv)
+
+    entries = read_audit(args.dir, _timestamp(args.since), _timestamp(args.until), args.disease, args.user)
+    if args.count:
+        print(sum(1 for _ in entries))
+        return
+    for entry in entries:
+        sys.stdout.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+if __name__ == "__main__":
+    main()
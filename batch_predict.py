@@ -0,0 +1,214 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from diseases import DISEASES
+from model_registry import get_model
+from pdf_reports import render_reports_bulk
+from screening import RuleStats, describe, screen
+from thresholds import apply_threshold
+
+# ===================== HEADLESS BATCH SCORING =====================
+# Usage:
+#   python batch_predict.py heart patients.csv heart_scores.csv --chunk-size 50000 --workers 4
+# Input columns must be named after DISEASES[<disease>]["features"]; every
+# other column is passed through to the output untouched. Rows that hit one
+# of the disease's screening rules are marked detected without running the
+# model (probability left empty, rule names in the "rule" column).
+
+
+# ===================== INPUT / OUTPUT =====================
+def is_parquet(path):
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def read_chunks(path, chunk_size):
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ResultWriter:
+    def __init__(self, path):
+        self.path = path
+        self.parquet = is_parquet(path)
+        self._parquet_writer = None
+        self._header_written = False
+
+    def write(self, frame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="a" if self._header_written else "w",
+                         header=not self._header_written, index=False)
+            self._header_written = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+# ===================== SCORING =====================
+def score_chunk(chunk, model, scaler, features, positive_classes, disease=None, rules=True, rule_stats=None):
+    missing = [c for c in features if c not in chunk.columns]
+    if missing:
+        raise KeyError(f"Input is missing feature columns: {missing}")
+
+    X = chunk[features].to_numpy(dtype=float)
+    prediction = np.full(len(chunk), np.nan)
+    probability = np.full(len(chunk), np.nan)
+
+    # Rule screening first: flagged rows are detected even with other
+    # values missing, and skip the model.
+    flagged, masks = screen(disease, X) if disease and rules else (np.zeros(len(X), dtype=bool), None)
+    prediction[flagged] = positive_classes[0]
+    if rule_stats is not None and masks is not None:
+        rule_stats.update(disease, masks)
+
+    valid = ~np.isnan(X).any(axis=1)
+    to_model = valid & ~flagged
+    if to_model.any():
+        X_scaled = scaler.transform(X[to_model])
+        if hasattr(model, "predict_proba"):
+            # predict() is argmax over predict_proba, so one pass gives both;
+            # a calibrated threshold (thresholds.py) replaces the argmax.
+            proba = model.predict_proba(X_scaled)
+            prediction[to_model] = apply_threshold(disease, model, proba) if disease else model.classes_.take(np.argmax(proba, axis=1))
+            probability[to_model] = proba[:, np.isin(model.classes_, positive_classes)].sum(axis=1)
+        else:
+            prediction[to_model] = model.predict(X_scaled)
+
+    out = chunk.copy()
+    out["prediction"] = prediction
+    out["probability"] = probability
+    out["detected"] = np.where(valid | flagged, np.isin(prediction, positive_classes), np.nan)
+    if masks is not None:
+        out["rule"] = describe(disease, masks)
+    return out
+
+
+# ===================== BULK PDF REPORTS =====================
+def report_jobs(frame, label, id_column=None):
+    for i, row in enumerate(frame.itertuples(index=False)):
+        record = row._asdict()
+        if record.get("rule"):
+            result_text = f"⚠️ {label} Detected (Rule-Based Alert: {record['rule']})"
+        elif np.isnan(record["prediction"]):
+            result_text = "Not scored: missing input values"
+        elif record["detected"]:
+            result_text = f"⚠️ {label} Detected (probability {record['probability']:.2f})"
+        else:
+            result_text = f"✅ No {label} Detected (probability {record['probability']:.2f})"
+        name = str(frame[id_column].iloc[i]) if id_column else "batch"
+        yield name, {"username": name, "disease": label, "result_text": result_text}
+
+
+def write_reports(frame, label, report_dir, first_row, id_column, executor):
+    names, jobs = zip(*report_jobs(frame, label, id_column)) if len(frame) else ((), ())
+    for offset, (name, pdf_bytes) in enumerate(zip(names, render_reports_bulk(jobs, executor=executor))):
+        file_name = f"{name}_{label}_Report.pdf" if id_column else f"{first_row + offset}_{label}_Report.pdf"
+        with open(os.path.join(report_dir, file_name.replace(" ", "_")), "wb") as f:
+            f.write(pdf_bytes)
+
+
+def run_batch(disease, input_path, output_path, chunk_size=10000, workers=1, quiet=False,
+              report_dir=None, id_column=None, backend="sklearn", rules=True):
+    spec = DISEASES[disease]
+    loaded = get_model(disease, backend)
+    model, scaler, features = loaded.model, loaded.scaler, loaded.features
+
+    writer = ResultWriter(output_path)
+    rule_stats = RuleStats()
+    rows = 0
+    start = time.perf_counter()
+    pending = deque()
+    report_pool = None
+    if report_dir:
+        os.makedirs(report_dir, exist_ok=True)
+        report_pool = ProcessPoolExecutor(max_workers=workers)
+
+    def flush_one():
+        nonlocal rows
+        frame = pending.popleft().result()
+        writer.write(frame)
+        if report_pool is not None:
+            write_reports(frame, spec["label"], report_dir, rows, id_column, report_pool)
+        rows += len(frame)
+        if not quiet:
+            elapsed = time.perf_counter() - start
+            print(f"{rows} rows scored ({rows / elapsed:,.0f} rows/sec)", file=sys.stderr)
+
+    # Keep at most 2 chunks per worker in flight so memory stays bounded and
+    # results are written in input order.
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for chunk in read_chunks(input_path, chunk_size):
+                pending.append(pool.submit(score_chunk, chunk, model, scaler, features, spec["positive_classes"],
+                                           disease, rules, rule_stats))
+                if len(pending) >= workers * 2:
+                    flush_one()
+            while pending:
+                flush_one()
+    finally:
+        writer.close()
+        if report_pool is not None:
+            report_pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "disease": disease,
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0,
+        "chunk_size": chunk_size,
+        "workers": workers,
+        "rules": rule_stats.report(),
+    }
+
+
+# ===================== CLI =====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file with one of the tabular disease models.")
+    parser.add_argument("disease", choices=sorted(DISEASES))
+    parser.add_argument("input", help="CSV or Parquet file with one patient per row")
+    parser.add_argument("output", help="CSV or Parquet file to write (overwritten)")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--quiet", action="store_true")
+    # sklearn's Cython tree walk wins on large chunks; the compiled numpy
+    # predictor wins on single rows (see benchmarks.py predict.*).
+    parser.add_argument("--backend", choices=["sklearn", "compiled"], default="sklearn")
+    parser.add_argument("--report-dir", help="also render one PDF report per row into this directory")
+    parser.add_argument("--id-column", help="column used as patient name and PDF file name")
+    parser.add_argument("--no-rules", action="store_true", help="score every row with the model, skip rule screening")
+    args = parser.parse_args(argv)
+
+    stats = run_batch(args.disease, args.input, args.output,
+                      chunk_size=args.chunk_size, workers=max(1, args.workers), quiet=args.quiet,
+                      report_dir=args.report_dir, id_column=args.id_column, backend=args.backend,
+                      rules=not args.no_rules)
+    print(f"✅ {stats['rows']} rows in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec, chunk_size={stats['chunk_size']}, workers={stats['workers']})")
+    if stats["rules"]:
+        print(f"Rule screening: {stats['rules'][0]['rows_flagged']} of {stats['rules'][0]['rows']} rows flagged before the model")
+        for entry in stats["rules"]:
+            print(f"  {entry['rule']:<40} {entry['hits']:>10} hits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from diseases import BASE_DIR, DISEASES
+
+# ===================== BENCHMARK SUITE =====================
+#   python benchmarks.py --output bench/HEAD.json
+#   python benchmarks.py --output bench/new.json --compare bench/HEAD.json
+# Every result is a flat entry {"unit": ..., "p50": ..., ...} keyed by a
+# stable name, so two JSON files from different commits diff cleanly.
+BATCH_ROWS = 10000
+
+
+def _stats(samples, unit="ms", **extra):
+    samples = np.asarray(samples, dtype=float)
+    return dict({
+        "unit": unit,
+        "n": int(len(samples)),
+        "mean": float(samples.mean()),
+        "p50": float(np.percentile(samples, 50)),
+        "p95": float(np.percentile(samples, 95)),
+        "min": float(samples.min()),
+    }, **extra)
+
+
+def time_call(fn, repeat=50, warmup=3):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+# ===================== MODEL LOAD =====================
+_COLD_LOAD = """
+import json, os, sys, time
+os.environ["MDDS_TABULAR_BACKEND"] = {backend!r}
+start = time.perf_counter()
+import model_registry
+model_registry.get_model({key!r})
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+
+def bench_model_load(results, repeat):
+    from model_registry import load_pickle_artifact
+    for key, spec in DISEASES.items():
+        for backend in ("sklearn", "compiled"):
+            samples = []
+            for _ in range(max(1, repeat // 10)):
+                out = subprocess.run([sys.executable, "-c", _COLD_LOAD.format(backend=backend, key=key)],
+                                     cwd=BASE_DIR, capture_output=True, text=True, check=True)
+                samples.append(json.loads(out.stdout.strip().splitlines()[-1])["seconds"] * 1000)
+            results[f"load.cold.{backend}.{key}"] = _stats(samples)
+        results[f"load.warm.sklearn.{key}"] = _stats(time_call(lambda: load_pickle_artifact(spec), repeat=max(3, repeat // 5)))
+        from compiled_models import compiled_path, load_compiled
+        path = compiled_path(key)
+        if os.path.exists(path):
+            results[f"load.warm.compiled.{key}"] = _stats(time_call(lambda: load_compiled(path), repeat=max(3, repeat // 5)))
+
+
+# ===================== TABULAR PREDICT =====================
+def bench_predict(results, repeat):
+    from compiled_models import ensure_compiled, load_compiled
+    from model_registry import load_pickle_artifact
+    rng = np.random.default_rng(0)
+    for key, spec in DISEASES.items():
+        model, scaler, features = load_pickle_artifact(spec)
+        backends = {"sklearn": (model, scaler), "compiled": load_compiled(ensure_compiled(key))[:2]}
+        row = scaler.mean_.reshape(1, -1) if hasattr(scaler, "mean_") else np.zeros((1, len(features)))
+        batch = row + rng.normal(0, 1, (BATCH_ROWS, row.shape[1])) * getattr(scaler, "scale_", 1.0)
+        for name, (m, s) in backends.items():
+            results[f"predict.single.{name}.{key}"] = _stats(time_call(lambda: m.predict(s.transform(row)), repeat))
+            samples = time_call(lambda: m.predict(s.transform(batch)), repeat=max(3, repeat // 10), warmup=1)
+            results[f"predict.batch{BATCH_ROWS}.{name}.{key}"] = _stats(
+                samples, rows_per_sec=BATCH_ROWS / (np.median(samples) / 1000))
+
+
+# ===================== BRAIN =====================
+def _standin_brain_model(input_shape):
+    # Same input shape as the production model, without the download.
+    try:
+        import tensorflow as tf
+    except ImportError:
+        class NumpyStandIn:
+            def __init__(self):
+                self.input_shape = (None,) + tuple(input_shape)
+
+            def predict(self, x, batch_size=32, verbose=0):
+                return x.reshape(len(x), -1).mean(axis=1, keepdims=True)
+        return NumpyStandIn(), "numpy"
+    layers = tf.keras.layers
+    if len(input_shape) == 1:
+        body = [layers.Dense(64, activation="relu")]
+    else:
+        body = [layers.Conv2D(16, 3, activation="relu"), layers.MaxPooling2D(),
+                layers.Conv2D(32, 3, activation="relu"), layers.GlobalAveragePooling2D()]
+    model = tf.keras.Sequential([tf.keras.Input(input_shape)] + body + [layers.Dense(1, activation="sigmoid")])
+    return model, "keras"
+
+
+def _scan(side, seed=0):
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    return Image.fromarray((rng.random((side, side, 3)) * 255).astype(np.uint8))
+
+
+def _jpeg_bytes(image):
+    from io import BytesIO
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def bench_brain(results, repeat, input_shape):
+    from brain_pipeline import decode_and_preprocess, open_upload, preprocess_image, preprocess_upload, run_brain_batch, target_size
+    model, kind = _standin_brain_model(input_shape)
+    for side in (512, 2048, 4000):
+        data = _jpeg_bytes(_scan(side))
+        for mode, draft in (("full", False), ("draft", True)):
+            # decoded_mb: size of the RGB image PIL materialises before resizing
+            decoded = open_upload(data, target_size(input_shape) if draft else None)
+            results[f"brain.preprocess.jpeg{side}.{mode}"] = _stats(
+                time_call(lambda: decode_and_preprocess(data, input_shape, draft=draft), repeat=max(5, repeat // 5)),
+                decoded_mb=decoded.width * decoded.height * 3 / 1e6)
+        preprocess_upload(data, input_shape)
+        results[f"brain.preprocess.jpeg{side}.cached"] = _stats(time_call(lambda: preprocess_upload(data, input_shape), repeat))
+    img = preprocess_image(_scan(512), input_shape)[np.newaxis]
+    results[f"brain.predict.single.{kind}"] = _stats(time_call(lambda: model.predict(img, verbose=0), repeat=max(5, repeat // 5)))
+    items = [(f"{i}.jpg", _jpeg_bytes(_scan(512, seed=i))) for i in range(32)]
+    samples = time_call(lambda: run_brain_batch(model, items, batch_size=32), repeat=3, warmup=1)
+    results[f"brain.batch32.{kind}"] = _stats(samples, images_per_sec=32 / (np.median(samples) / 1000))
+
+
+# ===================== PDF =====================
+def bench_pdf(results, repeat):
+    from pdf_reports import create_pdf
+    results["pdf.text"] = _stats(time_call(lambda: create_pdf("bench", "Heart Disease", "✅ No Heart Disease Detected"), repeat))
+    for side in (512, 4000):
+        image = _scan(side)
+        results[f"pdf.image{side}"] = _stats(time_call(lambda: create_pdf("bench", "Brain Tumor", "✅ No Brain Tumor Detected", image=image),
+                                                       repeat=max(3, repeat // 10)))
+
+
+# ===================== FULL PANEL =====================
+PANEL_VALUES = {
+    "age": 45, "sex": 1, "diastolic_bp": 80, "glucose": 120, "chest_pain": 0, "resting_bp": 120,
+    "cholesterol": 240, "fbs": 0, "rest_ecg": 1, "max_hr": 150, "exercise_angina": 0, "st_depression": 1.2,
+    "st_slope": 1, "vessels": 0, "thal": 2, "pregnancies": 2, "skin_thickness": 20, "insulin": 85,
+    "bmi": 28.5, "dpf": 0.5, "specific_gravity": 1.02, "urine_albumin": 0, "urine_sugar": 0,
+    "blood_urea": 25, "serum_creatinine": 1.0, "hemoglobin": 15.2, "pcv": 44, "total_bilirubin": 1.3,
+    "direct_bilirubin": 0.4, "alk_phos": 210, "alt": 35, "ast": 40, "total_proteins": 6.8,
+    "serum_albumin": 3.1, "ag_ratio": 0.9,
+}
+
+
+def bench_panel(results, repeat):
+    # Both modes go through run_panel() (rules, drift hook, micro-batch
+    # queue) after the same warm-up, so only the scheduling differs.
+    import panel
+    import settings
+    settings.DRIFT_ENABLED = False  # keep benchmark rows out of data/drift
+    for name, concurrent in (("concurrent", True), ("sequential", False)):
+        results[f"panel.{name}"] = _stats(time_call(lambda: panel.run_panel(PANEL_VALUES, concurrent), repeat))
+
+
+# ===================== RUN / COMPARE =====================
+SUITES = {"load": bench_model_load, "predict": bench_predict, "brain": bench_brain, "pdf": bench_pdf,
+          "panel": bench_panel}
+
+
+def _meta():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+
+
+def run(suites, repeat=50, brain_input_shape=(128, 128, 3)):
+    results = {}
+    for name in suites:
+        try:
+            if name == "brain":
+                bench_brain(results, repeat, brain_input_shape)
+            else:
+                SUITES[name](results, repeat)
+        except ImportError as e:
+            results[f"{name}.skipped"] = {"unit": "skipped", "reason": str(e)}
+    return {"meta": _meta(), "results": results}
+
+
+def compare(current, baseline):
+    print(f"\n{'benchmark':<42} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, entry in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old or "p50" not in entry or "p50" not in old:
+            continue
+        change = (entry["p50"] - old["p50"]) / old["p50"] * 100 if old["p50"] else 0.0
+        flag = "  ⚠️" if change > 10 else ""
+        print(f"{name:<42} {old['p50']:>8.3f}{old['unit']:>2} {entry['p50']:>8.3f}{entry['unit']:>2} {change:>+7.1f}%{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark model load, predict, brain preprocessing and PDF generation.")
+    parser.add_argument("--suite", choices=sorted(SUITES), action="append", help="run only these suites")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--brain-input-shape", default="128,128,3", help="input shape of the stand-in brain model")
+    parser.add_argument("--output", help="write JSON results here")
+    parser.add_argument("--compare", help="baseline JSON to compare p50s against")
+    args = parser.parse_args(argv)
+
+    shape = tuple(int(d) for d in args.brain_input_shape.split(","))
+    report = run(args.suite or list(SUITES), args.repeat, shape)
+    for name, entry in report["results"].items():
+        if "p50" in entry:
+            extra = "".join(f"  {k}={v:,.0f}" for k, v in entry.items() if k.endswith("_per_sec"))
+            extra += "".join(f"  {k}={v:,.1f}" for k, v in entry.items() if k.endswith("_mb"))
+            print(f"{name:<42} p50 {entry['p50']:9.3f} {entry['unit']}  p95 {entry['p95']:9.3f} {entry['unit']}{extra}")
+        else:
+            print(f"{name:<42} {entry}")
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import argparse
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+import settings
+from artifact_cache import read_manifest, sha256_file
+from brain_pipeline import IMAGE_EXTENSIONS, expand_uploads, predict_batch, preprocess_batch
+
+# ===================== BRAIN INFERENCE BACKENDS =====================
+# settings.BRAIN_BACKEND picks how get_model(BRAIN_KEY) serves the brain model:
+#   "keras"  - the original .h5 through tensorflow.keras (default)
+#   "tflite" - a TFLite flatbuffer exported from that .h5, optionally
+#              quantized (settings.BRAIN_QUANTIZATION: none / dynamic / int8)
+# Both expose .input_shape and .predict(x, batch_size=..., verbose=0), so
+# brain_tumor_page() does not care which one it gets.
+#   python brain_backends.py export --quantize dynamic
+#   python brain_backends.py export --quantize int8 --samples scans/
+#   python brain_backends.py parity --quantize int8 --samples study.zip
+# int8 is calibrated on real scans, so it is never exported on first use.
+# The flatbuffer name carries the source .h5's hash, so a newly fetched Keras
+# model is re-exported instead of the old export being served:
+#   brain_tumor_model.<sha256[:12]>.dynamic.tflite
+QUANTIZATION_MODES = ("none", "dynamic", "int8")
+
+
+def source_digest(source_path):
+    # The artifact manifest already holds the hash; re-hash only without one.
+    entry = read_manifest(os.path.dirname(source_path)).get(os.path.basename(source_path))
+    return entry["sha256"] if entry else sha256_file(source_path)
+
+
+def tflite_path(quantize, source_sha256, cache_dir=None):
+    suffix = "" if quantize == "none" else f".{quantize}"
+    return os.path.join(cache_dir or settings.MODEL_CACHE_DIR, f"brain_tumor_model.{source_sha256[:12]}{suffix}.tflite")
+
+
+def _remove_stale_exports(path):
+    # Same quantization, other source hash.
+    directory, name = os.path.split(path)
+    parts = name.split(".")
+    for other in os.listdir(directory):
+        other_parts = other.split(".")
+        if other != name and len(other_parts) == len(parts) and other_parts[0] == parts[0] \
+                and other_parts[2:] == parts[2:]:
+            os.remove(os.path.join(directory, other))
+
+
+def _interpreter_class():
+    # Prefer the standalone runtimes so serving does not import TensorFlow.
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+def random_samples(input_shape, count=32, seed=0):
+    # Pixels are normalised to [0, 1] by preprocess_image(), so uniform noise
+    # covers the same range when no real scans are at hand.
+    rng = np.random.default_rng(seed)
+    return rng.random((count,) + tuple(input_shape), dtype=np.float32)
+
+
+# ===================== EXPORT =====================
+def export_tflite(keras_model, out_path, quantize="none", representative=None):
+    import tensorflow as tf
+    if quantize not in QUANTIZATION_MODES:
+        raise ValueError(f"quantize must be one of {QUANTIZATION_MODES}, got {quantize!r}")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    if quantize in ("dynamic", "int8"):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == "int8":
+        if representative is None:
+            raise ValueError("int8 quantization needs representative scans for calibration")
+
+        def representative_dataset():
+            for sample in representative:
+                yield [np.asarray(sample, dtype=np.float32)[np.newaxis]]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    flatbuffer = converter.convert()
+
+    out_dir = os.path.dirname(out_path) or "."
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".part")
+    with os.fdopen(fd, "wb") as f:
+        f.write(flatbuffer)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+# ===================== TFLITE RUNTIME =====================
+class TFLiteBrainModel:
+    def __init__(self, path, num_threads=None):
+        self.path = path
+        self._interpreter = _interpreter_class()(model_path=path, num_threads=num_threads)
+        self._interpreter.allocate_tensors()
+        self._refresh_details()
+        self.input_shape = (None,) + tuple(int(d) for d in self._input["shape"][1:])
+        # One interpreter per model; invoke() is not re-entrant.
+        self._lock = threading.Lock()
+
+    def _refresh_details(self):
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+
+    def memory_bytes(self):
+        return os.path.getsize(self.path)
+
+    def _quantize(self, x):
+        dtype = self._input["dtype"]
+        if dtype == np.float32:
+            return x
+        scale, zero_point = self._input["quantization"]
+        info = np.iinfo(dtype)
+        return np.clip(np.round(x / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, y):
+        if self._output["dtype"] == np.float32:
+            return y
+        scale, zero_point = self._output["quantization"]
+        return (y.astype(np.float32) - zero_point) * scale
+
+    def _invoke(self, x):
+        if tuple(self._input["shape"]) != x.shape:
+            self._interpreter.resize_tensor_input(self._input["index"], x.shape)
+            self._interpreter.allocate_tensors()
+            self._refresh_details()
+        self._interpreter.set_tensor(self._input["index"], self._quantize(x))
+        self._interpreter.invoke()
+        return self._dequantize(self._interpreter.get_tensor(self._output["index"]).copy())
+
+    def predict(self, x, batch_size=32, verbose=0):
+        x = np.asarray(x, dtype=np.float32)
+        batch_size = batch_size or len(x)
+        with self._lock:
+            outputs = [self._invoke(x[i:i + batch_size]) for i in range(0, len(x), batch_size)]
+        return np.concatenate(outputs) if outputs else np.empty((0, 1), np.float32)
+
+
+def load_tflite_backend(source_path, keras_loader, quantize=None):
+    # Exports on first use when there is no flatbuffer for this .h5 yet; the
+    # export needs TensorFlow, serving afterwards only needs the interpreter.
+    quantize = quantize or settings.BRAIN_QUANTIZATION
+    path = tflite_path(quantize, source_digest(source_path))
+    if not os.path.exists(path):
+        if quantize == "int8":
+            raise FileNotFoundError(
+                f"No int8 export for this brain model ({os.path.basename(path)}). Calibrate one on real scans first: "
+                "python brain_backends.py export --quantize int8 --samples <dir>")
+        export_tflite(keras_loader(), path, quantize)
+        _remove_stale_exports(path)
+    return TFLiteBrainModel(path, num_threads=settings.BRAIN_TFLITE_THREADS or None)
+
+
+# ===================== ACCURACY PARITY =====================
+def parity_check(reference, candidate, samples, threshold=0.5, batch_size=32):
+    ref = predict_batch(reference, samples, batch_size)
+    out = predict_batch(candidate, samples, batch_size)
+    diff = np.abs(ref - out)
+    return {
+        "samples": int(len(samples)),
+        "max_abs_diff": float(diff.max()) if len(diff) else 0.0,
+        "mean_abs_diff": float(diff.mean()) if len(diff) else 0.0,
+        "decision_agreement": float(np.mean((ref > threshold) == (out > threshold))) if len(diff) else 1.0,
+    }
+
+
+def _load_samples(path, input_shape):
+    class _File:
+        def __init__(self, name):
+            self.name = name
+
+        def read(self):
+            with open(self.name, "rb") as f:
+                return f.read()
+
+    if os.path.isdir(path):
+        files = [_File(os.path.join(path, n)) for n in sorted(os.listdir(path))
+                 if n.lower().endswith(IMAGE_EXTENSIONS)]
+    else:
+        files = [_File(path)]
+    _, batch, _ = preprocess_batch(expand_uploads(files), input_shape)
+    return batch
+
+
+def main(argv=None):
+    from model_registry import brain_model_path, load_keras_brain_model
+
+    parser = argparse.ArgumentParser(description="Export the brain model to TFLite and check parity with Keras.")
+    parser.add_argument("command", choices=["export", "parity"])
+    parser.add_argument("--quantize", choices=QUANTIZATION_MODES, default=settings.BRAIN_QUANTIZATION)
+    parser.add_argument("--samples", help="directory of JPG/PNG scans or a ZIP; random inputs if omitted")
+    parser.add_argument("--count", type=int, default=64, help="number of random samples when --samples is omitted")
+    args = parser.parse_args(argv)
+
+    source = brain_model_path()
+    path = tflite_path(args.quantize, source_digest(source))
+    export = args.command == "export" or not os.path.exists(path)
+    if export and args.quantize == "int8" and not args.samples:
+        parser.error("exporting with --quantize int8 needs --samples: random inputs are no calibration set")
+    keras_model = load_keras_brain_model(source)
+    input_shape = keras_model.input_shape[1:]
+    samples = _load_samples(args.samples, input_shape) if args.samples else random_samples(input_shape, args.count)
+
+    if export:
+        export_tflite(keras_model, path, args.quantize, representative=samples)
+        _remove_stale_exports(path)
+        print(f"✅ Exported {path} ({os.path.getsize(path) / 1e6:.2f} MB)")
+
+    report = parity_check(keras_model, TFLiteBrainModel(path), samples)
+    print(f"Parity vs Keras on {report['samples']} samples: max |diff| {report['max_abs_diff']:.5f}, "
+          f"mean |diff| {report['mean_abs_diff']:.5f}, decision agreement {report['decision_agreement']:.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import hashlib
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import settings
+import thresholds
+from prediction_cache import PredictionCache
+
+# ===================== BRAIN MRI PIPELINE =====================
+# Shared by the single-image and batch paths of brain_tumor_page().
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def preprocess_image(image, input_shape):
+    # Same three branches the page always had: flattened dense input,
+    # grayscale CNN and RGB CNN. Returns one sample without the batch axis.
+    if len(input_shape) == 1:
+        side = int(np.sqrt(input_shape[0] / 3))
+        img = image.resize((side, side))
+        return (np.asarray(img, dtype=np.float32) / 255.0).reshape(-1)
+
+    elif input_shape[-1] == 1:
+        img = image.resize((input_shape[0], input_shape[1])).convert("L")
+        return (np.asarray(img, dtype=np.float32) / 255.0).reshape(input_shape[0], input_shape[1], 1)
+
+    else:
+        img = image.resize((input_shape[0], input_shape[1]))
+        return (np.asarray(img, dtype=np.float32) / 255.0).reshape(input_shape[0], input_shape[1], 3)
+
+
+def target_size(input_shape):
+    # (width, height) preprocess_image resizes to for this model input.
+    if len(input_shape) == 1:
+        side = int(np.sqrt(input_shape[0] / 3))
+        return side, side
+    return input_shape[0], input_shape[1]
+
+
+def open_upload(data, size=None):
+    # JPEGs are decoded straight at 1/2, 1/4 or 1/8 scale when that still
+    # covers `size` (PIL draft mode), so a 4000x4000 scan never materialises
+    # at full resolution just to be resized to the model input.
+    from PIL import Image
+    image = Image.open(io.BytesIO(data))
+    if size is not None and image.format == "JPEG":
+        image.draft("RGB", size)
+    return image.convert("RGB")
+
+
+# ===================== PREPROCESS CACHE =====================
+# Streamlit reruns brain_tumor_page() on every widget interaction; the float32
+# tensor for an upload is computed once and reused until evicted. No TTL: the
+# key is the content hash, so an entry can never go stale.
+_preprocess_cache = PredictionCache(settings.BRAIN_PREPROCESS_CACHE_SIZE, ttl_seconds=0)
+
+
+def preprocess_key(data, input_shape):
+    return ("preprocess", hashlib.sha256(data).hexdigest(), tuple(input_shape))
+
+
+def preprocess_upload(data, input_shape):
+    def compute():
+        array = decode_and_preprocess(data, input_shape)
+        array.flags.writeable = False  # shared across sessions
+        return array
+    return _preprocess_cache.get_or_compute(preprocess_key(data, input_shape), compute)
+
+
+def preprocess_cache_stats():
+    return _preprocess_cache.stats()
+
+
+# ===================== BATCH INPUT =====================
+def expand_uploads(files):
+    # Flattens uploaded images and ZIP archives into (name, bytes) pairs.
+    items = []
+    for f in files:
+        data = f.getvalue() if hasattr(f, "getvalue") else f.read()
+        if f.name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for info in archive.infolist():
+                    name = info.filename
+                    if info.is_dir() or os.path.basename(name).startswith(".") or not name.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    items.append((name, archive.read(info)))
+        else:
+            items.append((f.name, data))
+    return items
+
+
+def decode_and_preprocess(data, input_shape, draft=True):
+    image = open_upload(data, target_size(input_shape) if draft else None)
+    return preprocess_image(image, input_shape)
+
+
+def preprocess_batch(items, input_shape, workers=None):
+    # PIL releases the GIL while decoding and resizing, so threads scale here.
+    workers = workers or settings.BRAIN_PREPROCESS_WORKERS
+    names, arrays, errors = [], [], []
+
+    def work(item):
+        name, data = item
+        try:
+            return name, decode_and_preprocess(data, input_shape), None
+        except Exception as e:
+            return name, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for name, array, error in pool.map(work, items):
+            if error is None:
+                names.append(name)
+                arrays.append(array)
+            else:
+                errors.append({"file": name, "error": error})
+
+    batch = np.stack(arrays).astype(np.float32, copy=False) if arrays else np.empty((0,) + tuple(input_shape), np.float32)
+    return names, batch, errors
+
+
+def predict_batch(model, batch, batch_size=None):
+    if len(batch) == 0:
+        return np.empty(0, dtype=np.float32)
+    batch_size = batch_size or settings.BRAIN_BATCH_SIZE
+    return np.asarray(model.predict(batch, batch_size=batch_size, verbose=0)).reshape(len(batch), -1)[:, 0]
+
+
+def run_brain_batch(model, items, batch_size=None, workers=None, threshold=None):
+    # threshold=None: the calibrated brain threshold, if any (thresholds.py)
+    input_shape = model.input_shape[1:]
+
+    start = time.perf_counter()
+    names, batch, errors = preprocess_batch(items, input_shape, workers)
+    preprocessed = time.perf_counter()
+    scores = predict_batch(model, batch, batch_size)
+    done = time.perf_counter()
+
+    # One threshold lookup for the whole batch
+    detected = thresholds.brain_detected(scores, threshold)
+    results = [
+        {"file": name, "score": float(score), "result": "Tumor Detected" if hit else "No Tumor"}
+        for name, score, hit in zip(names, scores, detected)
+    ]
+    timing = {
+        "images": len(names),
+        "failed": len(errors),
+        "preprocess_seconds": preprocessed - start,
+        "predict_seconds": done - preprocessed,
+        "total_seconds": done - start,
+        "images_per_sec": len(names) / (done - start) if names else 0.0,
+    }
+    return results, errors, timing
+
+
+# ===================== VOLUMES =====================
+# Multi-slice studies: a NumPy volume (slices first: (n, h, w) or
+# (n, h, w, channels)) is memory-mapped, a multi-frame TIFF is read one frame
+# at a time. Slices are windowed to 8-bit with one study-wide range, go
+# through preprocess_image() like an upload, and reach the model in fixed-size
+# batches that reuse one buffer, so memory is one batch plus one slice however
+# large the study is.
+VOLUME_EXTENSIONS = (".npy", ".tif", ".tiff")
+
+
+class NumpyVolume:
+    def __init__(self, path):
+        self.array = np.load(path, mmap_mode="r")
+        if self.array.ndim == 2:
+            self.array = self.array[np.newaxis]
+        if self.array.ndim not in (3, 4):
+            raise ValueError(f"expected (slices, height, width[, channels]), got shape {self.array.shape}")
+
+    def __len__(self):
+        return len(self.array)
+
+    def pixels(self, i):
+        return np.asarray(self.array[i])
+
+    def close(self):
+        self.array = None
+
+
+class TiffVolume:
+    def __init__(self, path):
+        from PIL import Image
+        self.image = Image.open(path)
+        self.frames = getattr(self.image, "n_frames", 1)
+
+    def __len__(self):
+        return self.frames
+
+    def pixels(self, i):
+        self.image.seek(i)
+        return np.asarray(self.image)
+
+    def close(self):
+        self.image.close()
+
+
+def open_volume(path):
+    if path.lower().endswith(".npy"):
+        return NumpyVolume(path)
+    return TiffVolume(path)
+
+
+def intensity_range(volume):
+    # One streaming pass, a slice at a time.
+    low, high = np.inf, -np.inf
+    for i in range(len(volume)):
+        pixels = volume.pixels(i)
+        low, high = min(low, float(pixels.min())), max(high, float(pixels.max()))
+    return low, high
+
+
+def slice_image(pixels, low, high):
+    from PIL import Image
+    if pixels.dtype != np.uint8:
+        scale = 255.0 / (high - low) if high > low else 0.0
+        pixels = ((pixels.astype(np.float32) - low) * scale).clip(0, 255).astype(np.uint8)
+    if pixels.ndim == 3 and pixels.shape[-1] == 1:
+        pixels = pixels[..., 0]
+    return Image.fromarray(pixels).convert("RGB")
+
+
+def iter_slice_batches(volume, input_shape, batch_size=None):
+    # Yields (slice indices, batch view); the buffer is reused, so consume
+    # each batch before asking for the next.
+    batch_size = batch_size or settings.BRAIN_BATCH_SIZE
+    low, high = intensity_range(volume)
+    buffer = np.empty((batch_size,) + tuple(input_shape), dtype=np.float32)
+    indices = []
+    for i in range(len(volume)):
+        buffer[len(indices)] = preprocess_image(slice_image(volume.pixels(i), low, high), input_shape)
+        indices.append(i)
+        if len(indices) == batch_size:
+            yield indices, buffer
+            indices = []
+    if indices:
+        yield indices, buffer[:len(indices)]
+
+
+def score_volume(model, path, batch_size=None, threshold=None, progress=None):
+    # Returns (per-slice results, study summary). progress(done, total) is
+    # called after every batch.
+    input_shape = model.input_shape[1:]
+    batch_size = batch_size or settings.BRAIN_BATCH_SIZE
+    volume = open_volume(path)
+    start = time.perf_counter()
+    try:
+        total = len(volume)
+        scores = np.empty(total, dtype=np.float32)
+        for indices, batch in iter_slice_batches(volume, input_shape, batch_size):
+            scores[indices[0]:indices[-1] + 1] = predict_batch(model, batch, batch_size)
+            if progress:
+                progress(indices[-1] + 1, total)
+    finally:
+        volume.close()
+    seconds = time.perf_counter() - start
+
+    detected = thresholds.brain_detected(scores, threshold)
+    results = [{"slice": i, "score": float(score), "result": "Tumor Detected" if hit else "No Tumor"}
+               for i, (score, hit) in enumerate(zip(scores, detected))]
+    summary = {
+        "slices": total,
+        "detected_slices": int(detected.sum()),
+        "max_score": float(scores.max()) if total else 0.0,
+        "mean_score": float(scores.mean()) if total else 0.0,
+        "top_slices": [int(i) for i in np.argsort(scores)[::-1][:3]],
+        "detected": bool(detected.sum() >= settings.BRAIN_VOLUME_MIN_SLICES),
+        "seconds": seconds,
+        "slices_per_sec": total / seconds if seconds else 0.0,
+        "batch_mb": batch_size * int(np.prod(input_shape)) * 4 / 1e6,
+    }
+    return results, summary
@@ -0,0 +1,126 @@
+import argparse
+import time
+
+import settings
+
+# ===================== CHAT CLIENT =====================
+# The AI assistant page talks to a ChatClient instead of a growing
+# genai ChatSession: each turn sends only a bounded context window (recent
+# messages + a one-line digest of the dropped ones) and streams the reply
+# back chunk by chunk.
+#   python chat_client.py --backend fake --turns 30   # TTFT / context size report
+SYSTEM_PROMPT = (
+    "You are a health information assistant for a multi-disease diagnostic portal. "
+    "Answer questions about symptoms, diseases, reports and prevention, and recommend "
+    "seeing a doctor for diagnosis."
+)
+
+
+class GeminiClient:
+    def __init__(self, api_key, model_name=None):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self.model_name = model_name or settings.CHAT_MODEL
+
+    def stream(self, system, history, message):
+        # history: [{"role": "user" | "assistant", "content": str}, ...]
+        model = self._genai.GenerativeModel(self.model_name, system_instruction=system)
+        contents = [{"role": "model" if m["role"] == "assistant" else "user", "parts": [m["content"]]} for m in history]
+        contents.append({"role": "user", "parts": [message]})
+        for chunk in model.generate_content(contents, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeClient:
+    # Offline stand-in with configurable latency, for load and UI tests.
+    def __init__(self, first_token_delay=0.3, token_delay=0.02, reply_words=60):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.reply_words = reply_words
+        self.last_context_chars = 0
+
+    def stream(self, system, history, message):
+        self.last_context_chars = len(system) + sum(len(m["content"]) for m in history) + len(message)
+        time.sleep(self.first_token_delay)
+        for i in range(self.reply_words):
+            yield f"word{i} "
+            time.sleep(self.token_delay)
+
+
+def get_client(backend=None, api_key=None):
+    backend = backend or settings.CHAT_BACKEND
+    if backend == "fake":
+        return FakeClient()
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY is required for the gemini chat backend")
+    return GeminiClient(api_key)
+
+
+# ===================== CONTEXT WINDOW =====================
+def _digest(dropped, max_chars=600):
+    # Dropped turns become one line listing the user's earlier questions
+    # (most recent kept when over budget), without an extra model call.
+    questions = [" ".join(m["content"].split())[:120] for m in dropped if m["role"] == "user"]
+    digest = ""
+    for question in reversed(questions):
+        if len(digest) + len(question) + 2 > max_chars:
+            break
+        digest = f"{question}; {digest}" if digest else question
+    return digest
+
+
+def build_context(messages, max_messages=None, max_chars=None):
+    # Returns (system_instruction, recent_history) for the next request.
+    max_messages = max_messages or settings.CHAT_CONTEXT_MESSAGES
+    max_chars = max_chars or settings.CHAT_CONTEXT_CHARS
+    kept, used = [], 0
+    for message in reversed(messages[-max_messages:]):
+        if kept and used + len(message["content"]) > max_chars:
+            break
+        kept.append(message)
+        used += len(message["content"])
+    kept.reverse()
+    # Gemini expects the history to open with a user turn.
+    while kept and kept[0]["role"] != "user":
+        kept.pop(0)
+    dropped = messages[:len(messages) - len(kept)]
+    system = SYSTEM_PROMPT
+    digest = _digest(dropped)
+    if digest:
+        system += f"\nEarlier in this conversation the user asked about: {digest}"
+    return system, kept
+
+
+# ===================== LATENCY TEST =====================
+def simulate(turns=30, first_token_delay=0.3, token_delay=0.02):
+    client = FakeClient(first_token_delay, token_delay)
+    messages = []
+    for turn in range(turns):
+        question = f"Question {turn}: what are the early symptoms of condition {turn}?"
+        system, history = build_context(messages)
+        start = time.perf_counter()
+        stream = client.stream(system, history, question)
+        reply = next(stream)
+        ttft = time.perf_counter() - start
+        reply += "".join(stream)
+        total = time.perf_counter() - start
+        messages += [{"role": "user", "content": question}, {"role": "assistant", "content": reply}]
+        yield turn, ttft, total, client.last_context_chars
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chat latency and context-size check against the fake backend.")
+    parser.add_argument("--backend", choices=["fake"], default="fake")
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    for turn, ttft, total, context in simulate(args.turns, args.first_token_delay, args.token_delay):
+        print(f"turn {turn:3d}  first token {ttft * 1000:7.1f} ms  full reply {total * 1000:7.1f} ms  context {context:6d} chars")
+
+
+if __name__ == "__main__":
+    main()
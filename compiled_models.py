@@ -0,0 +1,307 @@
+import argparse
+import fcntl
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from artifact_cache import sha256_file
+from diseases import DISEASES, MODELS_DIR
+
+# ===================== COMPILED TABULAR MODELS =====================
+# Offline, each fitted scaler + classifier is flattened into plain NumPy
+# arrays, one .npy file each (models/compiled/<disease>-<sha12>/). At serve time they
+# are memory-mapped read-only, so every worker process on the host shares one
+# copy through the OS page cache. The predictors below only need numpy, skip
+# sklearn's per-call validation and return exactly what model.predict /
+# model.predict_proba would.
+#   python compiled_models.py compile --verify
+#   python compiled_models.py bench
+#   python rss_report.py --workers 4     # per-worker memory, pickle vs mmap
+# Supported: StandardScaler / MinMaxScaler, RandomForest / ExtraTrees
+# classifiers and linear classifiers (coef_ / intercept_).
+# Each directory is named after the sha256 of the pickle it was compiled
+# from (also kept in source_sha256.npy), so a replaced pickle points at a
+# new directory and published directories never change. ensure_compiled()
+# builds a missing one under a per-model file lock; other processes wait and
+# then use it.
+COMPILED_DIR = os.path.join(MODELS_DIR, "compiled")
+KEEP_VERSIONS = 2  # older directories are removed after a compile
+
+
+def compiled_path(key, source_sha256=None):
+    source_sha256 = source_sha256 or sha256_file(DISEASES[key]["model_path"])
+    return os.path.join(COMPILED_DIR, f"{key}-{source_sha256[:12]}")
+
+
+def ensure_compiled(key):
+    path = compiled_path(key)
+    if os.path.isdir(path):
+        return path
+    os.makedirs(COMPILED_DIR, exist_ok=True)
+    with open(os.path.join(COMPILED_DIR, f".{key}.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.isdir(path):  # not built while we waited
+            compile_artifact(key, path)
+            _remove_old_versions(key)
+    return path
+
+
+def _remove_old_versions(key):
+    # The previous version stays for workers that resolved it just before.
+    versions = sorted(glob.glob(os.path.join(COMPILED_DIR, f"{key}-*")), key=os.path.getmtime)
+    for path in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# ===================== COMPILE (needs sklearn) =====================
+def _compile_scaler(scaler):
+    name = type(scaler).__name__
+    n = scaler.n_features_in_
+    if name == "StandardScaler":
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(n)
+        scale = scaler.scale_ if scaler.with_std else np.ones(n)
+        return {"scaler_kind": "standard", "scaler_offset": np.asarray(mean, np.float64), "scaler_scale": np.asarray(scale, np.float64)}
+    if name == "MinMaxScaler":
+        return {"scaler_kind": "minmax", "scaler_offset": np.asarray(scaler.min_, np.float64), "scaler_scale": np.asarray(scaler.scale_, np.float64)}
+    raise TypeError(f"Cannot compile scaler of type {name}")
+
+
+def _compile_forest(model):
+    feature, threshold, children, values, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        is_leaf = tree.children_left == -1
+        idx = np.arange(offset, offset + n)
+        # Leaves point at themselves so every row can take the same number
+        # of steps without branching on "already at a leaf".
+        # children[2 * node] is the left child, children[2 * node + 1] the right
+        children.append(np.stack([np.where(is_leaf, idx, tree.children_left + offset),
+                                  np.where(is_leaf, idx, tree.children_right + offset)], axis=1).ravel())
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+        # Same normalisation DecisionTreeClassifier.predict_proba applies.
+        value = tree.value[:, 0, :model.n_classes_].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+        roots.append(offset)
+        offset += n
+        max_depth = max(max_depth, tree.max_depth)
+    return {
+        "model_kind": "forest",
+        "feature": np.concatenate(feature).astype(np.intp),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "children": np.concatenate(children).astype(np.intp),
+        "values": np.concatenate(values),
+        "roots": np.asarray(roots, np.intp),
+        "max_depth": np.asarray(max_depth),
+    }
+
+
+def _compile_linear(model):
+    return {
+        "model_kind": "linear",
+        "coef": np.asarray(model.coef_, np.float64),
+        "intercept": np.atleast_1d(np.asarray(model.intercept_, np.float64)),
+    }
+
+
+def compile_artifact(key, out_path=None):
+    # Always compile from the pickle, whatever backend the registry serves.
+    from model_registry import load_pickle_artifact
+    source_sha256 = sha256_file(DISEASES[key]["model_path"])
+    model, scaler, features = load_pickle_artifact(DISEASES[key])
+    if hasattr(model, "estimators_") and type(model).__name__ in ("RandomForestClassifier", "ExtraTreesClassifier"):
+        arrays = _compile_forest(model)
+    elif hasattr(model, "coef_"):
+        arrays = _compile_linear(model)
+    else:
+        raise TypeError(f"Cannot compile model of type {type(model).__name__}")
+    arrays.update(_compile_scaler(scaler))
+    arrays["classes"] = np.asarray(model.classes_)
+    arrays["features"] = np.asarray(features, dtype=str)
+    arrays["source_sha256"] = np.asarray(source_sha256)
+
+    out_path = out_path or compiled_path(key, source_sha256)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    # Written into a sibling temp dir and renamed into place in one step, so
+    # a worker never maps a half-written artifact.
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(out_path), prefix=f".{key}-")
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+    try:
+        os.rename(tmp_dir, out_path)
+    except OSError:
+        shutil.rmtree(tmp_dir)
+        if not os.path.isdir(out_path):
+            raise
+        # Another process published the same source first: same contents.
+    return out_path
+
+
+# ===================== SERVE (numpy only) =====================
+def _private_bytes(*arrays):
+    # Memory-mapped arrays live in the shared page cache, not in this process.
+    return sum(a.nbytes for a in arrays if not isinstance(a, np.memmap))
+
+
+class CompiledScaler:
+    def __init__(self, kind, offset, scale):
+        self.kind = kind
+        self.offset = offset
+        self.scale = scale
+
+    def memory_bytes(self):
+        return _private_bytes(self.offset, self.scale)
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if self.kind == "standard":
+            return (X - self.offset) / self.scale
+        return X * self.scale + self.offset
+
+
+class CompiledForest:
+    def __init__(self, arrays):
+        self.classes_ = arrays["classes"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.children = arrays["children"]
+        self.values = arrays["values"]
+        self.roots = arrays["roots"]
+        self.max_depth = int(arrays["max_depth"])
+
+    def memory_bytes(self):
+        return _private_bytes(self.feature, self.threshold, self.children, self.values, self.roots)
+
+    def apply(self, X):
+        # sklearn trees compare float32 features against float64 thresholds.
+        X = np.asarray(X, dtype=np.float32)
+        n_features = X.shape[1]
+        flat = X.ravel()
+        row_offset = (np.arange(len(X)) * n_features)[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            # Written as "not <=" so NaN goes right, as it does in sklearn.
+            go_right = ~(flat.take(row_offset + self.feature.take(node)) <= self.threshold.take(node))
+            node = self.children.take(2 * node + go_right)
+        return node
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        # The forest adds tree outputs one by one, in order; cumsum keeps that
+        # summation order (a plain sum() may switch to pairwise summation).
+        proba = np.cumsum(self.values[leaves], axis=1)[:, -1]
+        proba /= leaves.shape[1]
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+class CompiledLinear:
+    def __init__(self, arrays):
+        self.classes_ = arrays["classes"]
+        self.coef = arrays["coef"]
+        self.intercept = arrays["intercept"]
+
+    def memory_bytes(self):
+        return _private_bytes(self.coef, self.intercept)
+
+    def decision_function(self, X):
+        scores = np.asarray(X, dtype=np.float64) @ self.coef.T + self.intercept
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            positive = 1.0 / (1.0 + np.exp(-scores))
+            return np.column_stack([1.0 - positive, positive])
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        indices = (scores > 0).astype(int) if scores.ndim == 1 else scores.argmax(axis=1)
+        return self.classes_[indices]
+
+
+def load_compiled(path, mmap=True):
+    # Arrays are mapped read-only; pages are faulted in only when touched.
+    arrays = {}
+    for file_name in os.listdir(path):
+        if file_name.endswith(".npy"):
+            arrays[file_name[:-4]] = np.load(os.path.join(path, file_name), mmap_mode="r" if mmap else None, allow_pickle=False)
+    scaler = CompiledScaler(str(arrays["scaler_kind"]), arrays["scaler_offset"], arrays["scaler_scale"])
+    if str(arrays["model_kind"]) == "forest":
+        model = CompiledForest(arrays)
+    else:
+        model = CompiledLinear(arrays)
+    return model, scaler, [str(f) for f in arrays["features"]]
+
+
+# ===================== VERIFY / BENCH =====================
+def random_inputs(scaler, n, seed=0):
+    # Spread around the training distribution, plus far-out values.
+    rng = np.random.default_rng(seed)
+    center = getattr(scaler, "mean_", np.zeros(scaler.n_features_in_))
+    spread = getattr(scaler, "scale_", np.ones(scaler.n_features_in_))
+    X = center + spread * rng.normal(0.0, 1.5, (n, len(center)))
+    X[: n // 10] = center + spread * rng.uniform(-10, 10, (n // 10, len(center)))
+    return np.round(X, 2)
+
+
+def verify(key, n=10000):
+    from model_registry import load_pickle_artifact
+    ref_model, ref_scaler, _ = load_pickle_artifact(DISEASES[key])
+    model, scaler, _ = load_compiled(compiled_path(key))
+    X = random_inputs(ref_scaler, n)
+    expected_scaled = ref_scaler.transform(X)
+    scaled = scaler.transform(X)
+    return {
+        "rows": n,
+        "transform_equal": bool(np.array_equal(expected_scaled, scaled)),
+        "predict_equal": bool(np.array_equal(ref_model.predict(expected_scaled), model.predict(scaled))),
+        "proba_equal": bool(np.array_equal(ref_model.predict_proba(expected_scaled), model.predict_proba(scaled))),
+    }
+
+
+def bench(key, repeat=200):
+    model, scaler, features = load_compiled(compiled_path(key))
+    row = np.zeros((1, len(features)))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        model.predict(scaler.transform(row))
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the tabular models into numpy-only predictors.")
+    parser.add_argument("command", choices=["compile", "verify", "bench"])
+    parser.add_argument("--disease", choices=sorted(DISEASES), action="append")
+    parser.add_argument("--verify", action="store_true", help="verify right after compiling")
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    for key in args.disease or list(DISEASES):
+        if args.command == "compile":
+            path = ensure_compiled(key)
+            size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+            print(f"✅ {key}: {path} ({size / 1e6:.2f} MB)")
+        if args.command == "verify" or args.verify:
+            result = verify(key, args.rows)
+            status = "✅" if all(v for k, v in result.items() if k != "rows") else "❌"
+            print(f"{status} {key}: {result}")
+        if args.command == "bench":
+            print(f"{key}: single-row predict {bench(key) * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
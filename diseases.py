@@ -0,0 +1,57 @@
+import os
+
+# ===================== DISEASE SPECS =====================
+# One entry per tabular model. Shared by app.py, the pages/ scripts and the
+# headless tools (batch_predict.py) so feature order only lives in one place.
+# "rules" are the clinical red flags checked before the model, as
+# (feature, operator, threshold); any hit means "detected" without inference
+# (see screening.py). "positive_classes" are the model's class labels that
+# mean the disease is present (checked against model.classes_ on load).
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+
+DISEASES = {
+    "heart": {
+        "label": "Heart Disease",
+        "model_path": os.path.join(MODELS_DIR, "heart_model.pkl"),
+        "features": [
+            "Age", "Sex", "Chest pain type", "BP", "Cholesterol",
+            "FBS over 120", "EKG results", "Max HR", "Exercise angina",
+            "ST depression", "Slope of ST", "Number of vessels fluro", "Thallium"
+        ],
+        "positive_classes": [1],
+        "rules": [("Cholesterol", ">", 300), ("BP", ">", 160), ("Max HR", "<", 100)],
+    },
+    "diabetes": {
+        "label": "Diabetes",
+        "model_path": os.path.join(MODELS_DIR, "diabetes_model.pkl"),
+        "features": [
+            "Pregnancies", "Glucose", "BloodPressure", "SkinThickness",
+            "Insulin", "BMI", "DiabetesPedigreeFunction", "Age"
+        ],
+        "positive_classes": [1],
+        "rules": [("Glucose", ">", 180), ("BMI", ">", 40), ("Insulin", ">", 300)],
+    },
+    "kidney": {
+        "label": "Kidney Disease",
+        "model_path": os.path.join(MODELS_DIR, "kidney_10f_model.pkl"),
+        "features": ["age", "bp", "sg", "al", "su", "bgr", "bu", "sc", "hemo", "pcv"],
+        "positive_classes": [0, 1],  # 2 = not CKD
+        "rules": [("bu", ">", 90), ("sc", ">", 5), ("hemo", "<", 10), ("pcv", "<", 28)],
+    },
+    "liver": {
+        "label": "Liver Disease",
+        "model_path": os.path.join(MODELS_DIR, "liver_model.pkl"),
+        "features": [
+            "Age", "Gender", "Total_Bilirubin", "Direct_Bilirubin",
+            "Alkaline_Phosphotase", "Alamine_Aminotransferase",
+            "Aspartate_Aminotransferase", "Total_Proteins",
+            "Albumin", "Albumin_and_Globulin_Ratio"
+        ],
+        "positive_classes": [1],  # 2 = no liver disease
+        "rules": [
+            ("Total_Bilirubin", ">", 3), ("Direct_Bilirubin", ">", 1.5),
+            ("Alamine_Aminotransferase", ">", 200), ("Aspartate_Aminotransferase", ">", 200)
+        ],
+    },
+}
@@ -0,0 +1,233 @@
+import argparse
+import glob
+import json
+import math
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+import settings
+from diseases import DISEASES
+
+# ===================== INPUT DRIFT MONITOR =====================
+# observe(disease, inputs) on the hot path is a single deque.append. A
+# background thread folds the queued rows into per-feature running stats
+# every few seconds: count / mean / M2 (Welford, merged a batch at a time
+# with Chan's update), min / max and a fixed-bin histogram in z-score units
+# of the model's scaler (mean_ / scale_), which is also the reference
+# profile. Each process flushes its state to MDDS_DRIFT_DIR; the CLI merges
+# every worker's file:
+#   python drift.py            # drift table for all models, all workers
+Z_RANGE = 5.0
+BINS = 20
+MIN_ROWS = 30
+ALERT_MEAN_SHIFT = 1.0          # |live mean - reference mean| in reference SDs
+ALERT_STD_RATIO = (1 / 3, 3.0)  # live SD / reference SD outside this range
+
+
+class FeatureStats:
+    def __init__(self, ref_mean, ref_scale, bins=BINS):
+        self.ref_mean = np.asarray(ref_mean, dtype=float)
+        self.ref_scale = np.where(np.asarray(ref_scale, dtype=float) == 0, 1.0, ref_scale)
+        n = len(self.ref_mean)
+        self.bins = bins
+        self.count = 0
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        # Column 0 / -1 collect values beyond -Z_RANGE / +Z_RANGE.
+        self.hist = np.zeros((n, bins + 2), dtype=np.int64)
+
+    def update(self, X):
+        X = np.asarray(X, dtype=float)
+        X = X[~np.isnan(X).any(axis=1)]
+        if not len(X):
+            return
+        self._merge(len(X), X.mean(axis=0), ((X - X.mean(axis=0)) ** 2).sum(axis=0))
+        self.min = np.minimum(self.min, X.min(axis=0))
+        self.max = np.maximum(self.max, X.max(axis=0))
+        z = (X - self.ref_mean) / self.ref_scale
+        index = np.clip(np.floor((z + Z_RANGE) / (2 * Z_RANGE) * self.bins).astype(np.intp) + 1, 0, self.bins + 1)
+        flat = index + np.arange(X.shape[1]) * (self.bins + 2)
+        self.hist += np.bincount(flat.ravel(), minlength=self.hist.size).reshape(self.hist.shape)
+
+    def _merge(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    def merge(self, other):
+        if other.count:
+            self._merge(other.count, other.mean, other.m2)
+            self.min = np.minimum(self.min, other.min)
+            self.max = np.maximum(self.max, other.max)
+            self.hist += other.hist
+
+    def to_dict(self):
+        return {"ref_mean": self.ref_mean.tolist(), "ref_scale": self.ref_scale.tolist(), "count": self.count,
+                "mean": self.mean.tolist(), "m2": self.m2.tolist(), "min": self.min.tolist(),
+                "max": self.max.tolist(), "hist": self.hist.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data["ref_mean"], data["ref_scale"], len(data["hist"][0]) - 2)
+        stats.count = data["count"]
+        stats.mean, stats.m2 = np.array(data["mean"]), np.array(data["m2"])
+        stats.min, stats.max = np.array(data["min"], dtype=float), np.array(data["max"], dtype=float)
+        stats.hist = np.array(data["hist"], dtype=np.int64)
+        return stats
+
+    def expected_fractions(self):
+        # Reference histogram: normal(ref_mean, ref_scale) in the same bins.
+        edges = np.linspace(-Z_RANGE, Z_RANGE, self.bins + 1)
+        cdf = np.array([0.5 * (1 + math.erf(e / math.sqrt(2))) for e in edges])
+        return np.concatenate([[cdf[0]], np.diff(cdf), [1 - cdf[-1]]])
+
+    def report(self, features):
+        std = np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.zeros_like(self.mean)
+        shift = (self.mean - self.ref_mean) / self.ref_scale
+        ratio = std / self.ref_scale
+        expected = np.maximum(self.expected_fractions(), 1e-6)
+        actual = np.maximum(self.hist / max(self.count, 1), 1e-6)
+        psi = ((actual - expected) * np.log(actual / expected)).sum(axis=1)
+        rows = []
+        for i, feature in enumerate(features):
+            alert = self.count >= MIN_ROWS and (abs(shift[i]) > ALERT_MEAN_SHIFT
+                                                or not ALERT_STD_RATIO[0] <= ratio[i] <= ALERT_STD_RATIO[1])
+            rows.append({"feature": feature, "count": self.count, "mean": float(self.mean[i]), "std": float(std[i]),
+                         "min": float(self.min[i]), "max": float(self.max[i]),
+                         "ref_mean": float(self.ref_mean[i]), "ref_std": float(self.ref_scale[i]),
+                         "mean_shift_sd": float(shift[i]), "std_ratio": float(ratio[i]), "psi": float(psi[i]),
+                         "alert": bool(alert)})
+        return rows
+
+
+# ===================== PROCESS-WIDE MONITOR =====================
+_pending = deque(maxlen=100000)
+_stats = {}
+_lock = threading.Lock()
+_thread = None
+
+
+def observe(key, inputs):
+    # Hot path: no numpy, no lock (deque.append is atomic).
+    if settings.DRIFT_ENABLED:
+        _pending.append((key, inputs))
+        if _thread is None:
+            _start()
+
+
+def _reference(key):
+    from model_registry import get_model
+    scaler = get_model(key).scaler
+    mean = getattr(scaler, "mean_", None)
+    if mean is None and getattr(scaler, "kind", None) == "standard":
+        return scaler.offset, scaler.scale  # compiled StandardScaler
+    if mean is None:
+        return None
+    return mean, scaler.scale_
+
+
+def fold():
+    # Moves queued rows into the running stats; called by the flush thread.
+    rows = {}
+    while True:
+        try:
+            key, inputs = _pending.popleft()
+        except IndexError:
+            break
+        rows.setdefault(key, []).append(inputs)
+    with _lock:
+        for key, batch in rows.items():
+            if key not in _stats:
+                reference = _reference(key)
+                if reference is None:
+                    continue
+                _stats[key] = FeatureStats(*reference)
+            _stats[key].update(batch)
+
+
+def state_path():
+    return os.path.join(settings.DRIFT_DIR, f"drift-{socket.gethostname()}-{os.getpid()}.json")
+
+
+def flush():
+    fold()
+    with _lock:
+        data = {key: stats.to_dict() for key, stats in _stats.items()}
+    if not data:
+        return
+    os.makedirs(settings.DRIFT_DIR, exist_ok=True)
+    path = state_path()
+    with open(f"{path}.part", "w") as f:
+        json.dump({"written_at": time.time(), "models": data}, f)
+    os.replace(f"{path}.part", path)
+
+
+def _loop():
+    last_flush = time.monotonic()
+    while True:
+        time.sleep(settings.DRIFT_FOLD_SECONDS)
+        try:
+            fold()
+            if time.monotonic() - last_flush >= settings.DRIFT_FLUSH_SECONDS:
+                flush()
+                last_flush = time.monotonic()
+        except Exception:
+            pass  # monitoring must never take the app down
+
+
+def _start():
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_loop, name="drift-monitor", daemon=True)
+            _thread.start()
+
+
+def live_report():
+    # This process only, for the Metrics page.
+    fold()
+    with _lock:
+        return {key: stats.report(DISEASES[key]["features"]) for key, stats in _stats.items()}
+
+
+def merged_report(directory=None):
+    # Every worker's last flush, merged.
+    merged = {}
+    for path in glob.glob(os.path.join(directory or settings.DRIFT_DIR, "drift-*.json")):
+        with open(path) as f:
+            for key, data in json.load(f)["models"].items():
+                stats = FeatureStats.from_dict(data)
+                if key in merged:
+                    merged[key].merge(stats)
+                else:
+                    merged[key] = stats
+    return {key: stats.report(DISEASES[key]["features"]) for key, stats in merged.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Input drift per model feature, merged across worker processes.")
+    parser.add_argument("--dir", help=f"state directory (default {settings.DRIFT_DIR})")
+    parser.add_argument("--alerts-only", action="store_true")
+    args = parser.parse_args(argv)
+
+    for key, rows in merged_report(args.dir).items():
+        print(f"\n{DISEASES[key]['label']} ({rows[0]['count']} rows)")
+        print(f"{'feature':<28} {'mean':>10} {'ref mean':>10} {'shift':>7} {'sd ratio':>8} {'psi':>6}")
+        for row in rows:
+            if args.alerts_only and not row["alert"]:
+                continue
+            print(f"{row['feature']:<28} {row['mean']:>10.3f} {row['ref_mean']:>10.3f} {row['mean_shift_sd']:>+7.2f} "
+                  f"{row['std_ratio']:>8.2f} {row['psi']:>6.2f}{'  ⚠️ drift' if row['alert'] else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import settings
+import thresholds
+from batch_predict import read_chunks
+from diseases import DISEASES
+from model_registry import BRAIN_KEY, get_model
+
+# ===================== MODEL EVALUATION =====================
+# Streams a labelled CSV/Parquet through one model in large chunks and keeps
+# only two score histograms (positives / negatives) plus a few running sums,
+# so memory is O(bins) however many rows there are. Curves, AUCs, the
+# confusion matrix and calibration all come from those histograms.
+#   python evaluate.py heart labelled.csv --label-column target --save-threshold
+#   python evaluate.py brain studies.csv --label-column label --image-column image
+# Tabular: feature columns named after DISEASES[<disease>]["features"]; the
+# model alone is evaluated (no rule screening). Brain: a manifest with one
+# image path per row, relative to the manifest's folder.
+# Thresholds are probability >= t, picked from the bin edges.
+BINS = 1000
+CALIBRATION_BINS = 10
+
+
+class ScoreHistogram:
+    def __init__(self, bins=BINS):
+        self.bins = bins
+        self.pos = np.zeros(bins + 1, dtype=np.int64)
+        self.neg = np.zeros(bins + 1, dtype=np.int64)
+        self.sum_score = np.zeros(bins + 1)
+        self.brier = 0.0
+
+    def update(self, scores, positive):
+        scores = np.clip(np.asarray(scores, dtype=float), 0.0, 1.0)
+        # Bin i holds scores in [i/bins, (i+1)/bins); the epsilon keeps
+        # exact multiples (forest votes like 0.3) out of the bin below.
+        index = np.floor(scores * self.bins + 1e-9).astype(np.intp)
+        self.pos += np.bincount(index[positive], minlength=self.bins + 1)
+        self.neg += np.bincount(index[~positive], minlength=self.bins + 1)
+        self.sum_score += np.bincount(index, weights=scores, minlength=self.bins + 1)
+        self.brier += float(np.sum((scores - positive) ** 2))
+
+    # --- curves: point i = "detected if score >= i / bins" ---
+    def curves(self):
+        tp = np.cumsum(self.pos[::-1])[::-1]
+        fp = np.cumsum(self.neg[::-1])[::-1]
+        P, N = self.pos.sum(), self.neg.sum()
+        tpr = tp / P if P else np.zeros_like(tp, dtype=float)
+        fpr = fp / N if N else np.zeros_like(fp, dtype=float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            precision = np.where(tp + fp > 0, tp / (tp + fp), 1.0)
+        return {"threshold": np.arange(self.bins + 1) / self.bins, "tp": tp, "fp": fp,
+                "tpr": tpr, "fpr": fpr, "precision": precision}
+
+    def confusion(self, threshold):
+        i = int(np.ceil(threshold * self.bins - 1e-9))
+        tp, fn = int(self.pos[i:].sum()), int(self.pos[:i].sum())
+        fp, tn = int(self.neg[i:].sum()), int(self.neg[:i].sum())
+        return {"tp": tp, "fp": fp, "tn": tn, "fn": fn,
+                "sensitivity": tp / (tp + fn) if tp + fn else 0.0,
+                "specificity": tn / (tn + fp) if tn + fp else 0.0,
+                "precision": tp / (tp + fp) if tp + fp else 0.0,
+                "accuracy": (tp + tn) / (tp + tn + fp + fn) if tp + tn + fp + fn else 0.0}
+
+    def calibration(self, n_bins=CALIBRATION_BINS):
+        groups = np.minimum(np.arange(self.bins + 1) * n_bins // self.bins, n_bins - 1)
+        count = np.bincount(groups, weights=self.pos + self.neg, minlength=n_bins)
+        positives = np.bincount(groups, weights=self.pos, minlength=n_bins)
+        scores = np.bincount(groups, weights=self.sum_score, minlength=n_bins)
+        return [
+            {"bin": f"{b / n_bins:.1f}-{(b + 1) / n_bins:.1f}", "rows": int(c),
+             "mean_predicted": float(s / c), "observed_rate": float(p / c)}
+            for b, (c, p, s) in enumerate(zip(count, positives, scores)) if c
+        ]
+
+
+def auc_scores(curves):
+    # Points run from threshold 0 (everything detected) to 1; reverse so the
+    # FPR / recall axes increase, starting from the (0, 0) corner.
+    fpr = np.r_[0.0, curves["fpr"][::-1]]
+    tpr = np.r_[0.0, curves["tpr"][::-1]]
+    precision = np.r_[1.0, curves["precision"][::-1]]
+    roc_auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+    average_precision = float(np.sum(np.diff(tpr) * precision[1:]))
+    return roc_auc, average_precision
+
+
+def choose_threshold(curves, criterion="youden", min_sensitivity=None):
+    tpr, fpr, precision = curves["tpr"], curves["fpr"], curves["precision"]
+    if min_sensitivity is not None:
+        # Highest threshold that still catches the required share of positives.
+        candidates = np.flatnonzero(tpr >= min_sensitivity)
+        i = int(candidates[-1]) if candidates.size else 0
+    elif criterion == "f1":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            f1 = np.where(precision + tpr > 0, 2 * precision * tpr / (precision + tpr), 0.0)
+        i = int(np.argmax(f1))
+    else:
+        i = int(np.argmax(tpr - fpr))
+    return float(curves["threshold"][i])
+
+
+# ===================== SCORING STREAMS =====================
+def _positive_labels(key, labels, positive_label):
+    # positive_label: list of label values, or None for the spec's classes.
+    targets = DISEASES[key]["positive_classes"] if key in DISEASES else [1]
+    targets = positive_label or targets
+    return np.isin(np.asarray(labels).astype(str), [str(t) for t in targets])
+
+
+def tabular_scores(key, path, label_column, chunk_size, positive_label=None, backend=None):
+    loaded = get_model(key, backend)
+    for chunk in read_chunks(path, chunk_size):
+        X = chunk[loaded.features].to_numpy(dtype=float)
+        keep = ~np.isnan(X).any(axis=1) & chunk[label_column].notna().to_numpy()
+        if not keep.any():
+            continue
+        proba = loaded.model.predict_proba(loaded.scaler.transform(X[keep]))
+        yield thresholds.positive_proba(key, loaded.model, proba), \
+            _positive_labels(key, chunk[label_column].to_numpy()[keep], positive_label)
+
+
+def brain_scores(path, label_column, image_column, chunk_size, positive_label=None):
+    from brain_pipeline import predict_batch, preprocess_batch
+    model = get_model(BRAIN_KEY).model
+    base = os.path.dirname(os.path.abspath(path))
+    for chunk in read_chunks(path, chunk_size):
+        labels = dict(zip(chunk[image_column].astype(str), chunk[label_column]))
+        items = []
+        for name in labels:
+            with open(os.path.join(base, name), "rb") as f:
+                items.append((name, f.read()))
+        names, batch, errors = preprocess_batch(items, model.input_shape[1:])
+        for error in errors:
+            print(f"skipped {error['file']}: {error['error']}", file=sys.stderr)
+        if names:
+            yield predict_batch(model, batch), _positive_labels(BRAIN_KEY, [labels[n] for n in names], positive_label)
+
+
+def evaluate(stream, bins=BINS, criterion="youden", min_sensitivity=None, quiet=False):
+    histogram = ScoreHistogram(bins)
+    rows, start = 0, time.perf_counter()
+    for scores, positive in stream:
+        histogram.update(scores, positive)
+        rows += len(scores)
+        if not quiet:
+            print(f"{rows} rows evaluated ({rows / (time.perf_counter() - start):,.0f} rows/sec)", file=sys.stderr)
+
+    curves = histogram.curves()
+    roc_auc, average_precision = auc_scores(curves)
+    threshold = choose_threshold(curves, criterion, min_sensitivity)
+    return {
+        "rows": rows,
+        "positives": int(histogram.pos.sum()),
+        "roc_auc": roc_auc,
+        "average_precision": average_precision,
+        "brier": histogram.brier / rows if rows else 0.0,
+        "criterion": f"sensitivity>={min_sensitivity}" if min_sensitivity is not None else criterion,
+        "threshold": threshold,
+        "at_threshold": histogram.confusion(threshold),
+        "at_default": histogram.confusion(0.5),
+        "calibration": histogram.calibration(),
+        "curves": {k: v.tolist() for k, v in curves.items()},
+    }
+
+
+# ===================== CLI =====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a model on labelled data and pick its operating threshold.")
+    parser.add_argument("disease", choices=sorted(DISEASES) + [BRAIN_KEY])
+    parser.add_argument("input", help="labelled CSV or Parquet (brain: manifest of image paths)")
+    parser.add_argument("--label-column", default="target")
+    parser.add_argument("--positive-label", action="append",
+                        help="label value meaning 'disease present', repeatable (default: the spec's positive_classes, brain: 1)")
+    parser.add_argument("--image-column", default="image", help="brain only: column with image paths")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--backend", choices=["sklearn", "compiled"], default=settings.TABULAR_BACKEND,
+                        help="default: the backend the app serves (MDDS_TABULAR_BACKEND)")
+    parser.add_argument("--criterion", choices=["youden", "f1"], default="youden")
+    parser.add_argument("--min-sensitivity", type=float, help="pick the highest threshold reaching this sensitivity instead")
+    parser.add_argument("--output", help="write the full report (with curves) as JSON")
+    parser.add_argument("--save-threshold", action="store_true", help=f"store the threshold for the app in {os.path.basename(settings.THRESHOLDS_PATH)}")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.disease == BRAIN_KEY:
+        stream = brain_scores(args.input, args.label_column, args.image_column, min(args.chunk_size, 256), args.positive_label)
+    else:
+        stream = tabular_scores(args.disease, args.input, args.label_column, args.chunk_size, args.positive_label, args.backend)
+    report = evaluate(stream, criterion=args.criterion, min_sensitivity=args.min_sensitivity, quiet=args.quiet)
+
+    print(f"rows {report['rows']}  positives {report['positives']}  ROC AUC {report['roc_auc']:.4f}  "
+          f"AP {report['average_precision']:.4f}  Brier {report['brier']:.4f}")
+    for name, cm in (("default 0.5", report["at_default"]), (f"threshold {report['threshold']:.3f}", report["at_threshold"])):
+        print(f"{name:<18} TP {cm['tp']:>8} FP {cm['fp']:>8} TN {cm['tn']:>8} FN {cm['fn']:>8}  "
+              f"sens {cm['sensitivity']:.3f} spec {cm['specificity']:.3f} prec {cm['precision']:.3f}")
+    print("calibration: " + "  ".join(f"{c['bin']} {c['mean_predicted']:.2f}->{c['observed_rate']:.2f}" for c in report["calibration"]))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f)
+    if args.save_threshold:
+        if not 0 < report["positives"] < report["rows"]:
+            sys.exit(f"❌ not saving a threshold: {report['positives']} of {report['rows']} rows are positive; "
+                     "the evaluation set needs both classes")
+        # Version of the model the app serves, which thresholds.stale_thresholds() checks
+        thresholds.save_threshold(args.disease, {
+            "threshold": report["threshold"],
+            "criterion": report["criterion"],
+            "rows": report["rows"],
+            "roc_auc": report["roc_auc"],
+            "model_version": get_model(args.disease).version,
+            "evaluated_backend": None if args.disease == BRAIN_KEY else args.backend,
+            "evaluated_on": os.path.basename(args.input),
+        })
+        print(f"✅ saved threshold {report['threshold']:.3f} for {args.disease}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import argparse
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+import metrics
+import settings
+import thresholds
+from model_registry import BRAIN_KEY, get_model
+
+# ===================== LOCAL INFERENCE SERVICE =====================
+# In-process request coalescing. Every Streamlit session submits its single
+# row / single image to a per-model queue; one worker thread per model drains
+# the queue into a batch (up to MAX_BATCH_SIZE requests or MAX_WAIT_MS after
+# the first one) and runs one vectorised predict for all of them.
+#   python inference_service.py --disease heart --clients 32   # p50/p99 report
+
+
+class MicroBatcher:
+    def __init__(self, name, batch_fn, max_batch_size=64, max_wait=0.005, latency_window=10000):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=latency_window)
+        self._batch_sizes = deque(maxlen=latency_window)
+        self._thread = threading.Thread(target=self._run, name=f"microbatch-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued first; only then wait (up to
+            # max_wait) for stragglers. With max_wait=0 this is purely greedy.
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _, _ in batch]
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            done = time.perf_counter()
+            for (_, future, submitted), result in zip(batch, results):
+                self._latencies.append(done - submitted)
+                future.set_result(result)
+            self._batch_sizes.append(len(batch))
+
+    def stats(self):
+        latencies = np.array(self._latencies) * 1000
+        return {
+            "requests": len(latencies),
+            "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+            "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else 0.0,
+            "mean_batch_size": float(np.mean(self._batch_sizes)) if self._batch_sizes else 0.0,
+            "queue_depth": self._queue.qsize(),
+        }
+
+
+# ===================== BATCH FUNCTIONS =====================
+def _tabular_batch_fn(key):
+    def run(rows):
+        loaded = get_model(key)
+        X = np.asarray(rows, dtype=float).reshape(len(rows), -1)
+        # Timed once per coalesced batch, not per request.
+        with metrics.stage(key, "transform"):
+            X = loaded.scaler.transform(X)
+        with metrics.stage(key, "model_predict"):
+            return list(thresholds.predict(key, loaded.model, X))
+    return run
+
+
+def _brain_batch_fn(arrays):
+    model = get_model(BRAIN_KEY).model
+    batch = np.concatenate(arrays).astype(np.float32, copy=False)
+    with metrics.stage(BRAIN_KEY, "model_predict"):
+        scores = np.asarray(model.predict(batch, batch_size=len(batch), verbose=0)).reshape(len(batch), -1)[:, 0]
+    return [float(s) for s in scores]
+
+
+_batchers = {}
+_lock = threading.Lock()
+
+
+def get_batcher(key):
+    batcher = _batchers.get(key)
+    if batcher is None:
+        with _lock:
+            batcher = _batchers.get(key)
+            if batcher is None:
+                batch_fn = _brain_batch_fn if key == BRAIN_KEY else _tabular_batch_fn(key)
+                batcher = MicroBatcher(key, batch_fn, settings.MICROBATCH_MAX_BATCH_SIZE,
+                                       settings.MICROBATCH_MAX_WAIT_MS / 1000.0)
+                _batchers[key] = batcher
+    return batcher
+
+
+# ===================== PUBLIC API =====================
+def submit_tabular(key, inputs):
+    return get_batcher(key).submit(list(inputs))
+
+
+def submit_brain(img_array):
+    # img_array keeps its leading batch axis of 1, as built by the page.
+    return get_batcher(BRAIN_KEY).submit(img_array)
+
+
+def predict_tabular(key, inputs, timeout=None):
+    if not settings.MICROBATCH_ENABLED:
+        return _tabular_batch_fn(key)([list(inputs)])[0]
+    return submit_tabular(key, inputs).result(timeout)
+
+
+def predict_brain(img_array, timeout=None):
+    if not settings.MICROBATCH_ENABLED:
+        return _brain_batch_fn([img_array])[0]
+    return submit_brain(img_array).result(timeout)
+
+
+def service_stats():
+    return {key: batcher.stats() for key, batcher in _batchers.items()}
+
+
+# ===================== SYNTHETIC LOAD =====================
+def load_test(key, clients=32, requests_per_client=50, coalesce=True, seed=0):
+    n_features = len(get_model(key).features)
+    rng = np.random.default_rng(seed)
+    rows = rng.normal(50, 20, (clients * requests_per_client, n_features)).round(1)
+    direct = _tabular_batch_fn(key)
+    latencies = []
+
+    def client(offset):
+        out = []
+        for row in rows[offset:offset + requests_per_client]:
+            start = time.perf_counter()
+            if coalesce:
+                submit_tabular(key, row).result()
+            else:
+                direct([row])
+            out.append(time.perf_counter() - start)
+        return out
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for result in pool.map(client, range(0, len(rows), requests_per_client)):
+            latencies.extend(result)
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return {
+        "mode": "coalesced" if coalesce else "direct",
+        "requests": len(latencies),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "throughput_rps": len(latencies) / elapsed,
+    }
+
+
+def main(argv=None):
+    from diseases import DISEASES
+    parser = argparse.ArgumentParser(description="Synthetic concurrent load against the micro-batching service.")
+    parser.add_argument("--disease", choices=sorted(DISEASES), default="heart")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    args = parser.parse_args(argv)
+
+    get_model(args.disease)
+    for coalesce in (False, True):
+        r = load_test(args.disease, args.clients, args.requests, coalesce=coalesce)
+        print(f"{r['mode']:<10} {r['requests']} requests  p50 {r['p50_ms']:7.2f} ms  "
+              f"p99 {r['p99_ms']:7.2f} ms  {r['throughput_rps']:8.0f} req/s")
+    stats = get_batcher(args.disease).stats()
+    print(f"mean batch size {stats['mean_batch_size']:.1f} "
+          f"(max {settings.MICROBATCH_MAX_BATCH_SIZE}, wait {settings.MICROBATCH_MAX_WAIT_MS} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import settings
+
+# ===================== BACKGROUND JOBS =====================
+# Slow work (brain inference + PDF) runs on a small per-kind thread pool
+# instead of the Streamlit script thread. submit() returns a job id the page
+# keeps in session_state and polls with status(); when MAX_PENDING jobs are
+# already queued or running, submit() raises QueueFull so the page can ask
+# the user to retry instead of piling up threads.
+QUEUED, RUNNING, DONE, FAILED, UNKNOWN = "queued", "running", "done", "failed", "unknown"
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    def __init__(self, name, max_workers=2, max_pending=16, keep_seconds=600):
+        self.name = name
+        self.max_pending = max_pending
+        self.keep_seconds = keep_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"jobs-{name}")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _active(self):
+        return sum(1 for job in self._jobs.values() if job["state"] in (QUEUED, RUNNING))
+
+    def _expire(self, now):
+        for job_id in [j for j, job in self._jobs.items() if job["finished_at"] and now - job["finished_at"] > self.keep_seconds]:
+            del self._jobs[job_id]
+
+    def submit(self, fn, *args, **kwargs):
+        # fn(progress, *args, **kwargs); progress(fraction, message) updates
+        # what status() reports while the job runs.
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if self._active() >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"{self.name}: {self.max_pending} jobs already waiting")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {"state": QUEUED, "progress": 0.0, "message": "Waiting in queue",
+                                  "submitted_at": now, "started_at": None, "finished_at": None,
+                                  "result": None, "error": None}
+        self._pool.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._update(job_id, state=RUNNING, started_at=time.monotonic(), message="Starting")
+        progress = lambda fraction, message="": self._update(job_id, progress=fraction, message=message)
+        try:
+            result = fn(progress, *args, **kwargs)
+        except Exception as e:
+            self._update(job_id, state=FAILED, error=str(e), finished_at=time.monotonic())
+        else:
+            self._update(job_id, state=DONE, result=result, progress=1.0, message="Done", finished_at=time.monotonic())
+
+    def status(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return {"state": UNKNOWN}
+            status = dict(job)
+        now = time.monotonic()
+        status["queued_seconds"] = (status["started_at"] or now) - status["submitted_at"]
+        status["seconds"] = (status["finished_at"] or now) - status["submitted_at"]
+        return status
+
+    def stats(self):
+        with self._lock:
+            states = [job["state"] for job in self._jobs.values()]
+        return {"queued": states.count(QUEUED), "running": states.count(RUNNING),
+                "max_pending": self.max_pending, "rejected": self.rejected}
+
+
+brain_jobs = JobQueue("brain", settings.BRAIN_JOB_WORKERS, settings.BRAIN_JOB_QUEUE_LIMIT)
@@ -0,0 +1,182 @@
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import settings
+
+# ===================== STAGE METRICS =====================
+# Usage on a hot path:
+#     with metrics.stage("heart", "predict"):
+#         ...
+# When MDDS_METRICS=0, stage() hands back one shared no-op context manager,
+# so the disabled cost is a function call and an attribute check.
+# Export: prometheus_text() / an optional /metrics HTTP endpoint
+# (MDDS_METRICS_PORT), a JSON snapshot file (MDDS_METRICS_JSON) and the
+# Admin Metrics page.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RESERVOIR_SIZE = 2048
+
+_NOOP = nullcontext()
+_histograms = {}
+_lock = threading.Lock()
+_exporters_started = False
+_http_started = False
+_http_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        # Recent samples for exact percentiles; bounded, O(1) append.
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, seconds):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+    def percentiles(self):
+        samples = sorted(self.recent)
+        if not samples:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+        pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+        return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+class _StageTimer:
+    __slots__ = ("key", "start")
+
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.key[0], self.key[1], time.perf_counter() - self.start)
+        return False
+
+
+def stage(disease, name):
+    if not settings.METRICS_ENABLED:
+        return _NOOP
+    return _StageTimer((disease, name))
+
+
+def observe(disease, name, seconds):
+    key = (disease, name)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+            _start_exporters()
+        histogram.observe(seconds)
+
+
+# ===================== EXPORT =====================
+def snapshot():
+    with _lock:
+        items = [(key, h.count, h.sum, list(h.buckets), h.percentiles()) for key, h in _histograms.items()]
+    return [
+        dict({"disease": disease, "stage": name, "count": count, "sum_seconds": total,
+              "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], buckets))}, **{f"{k}_ms": v * 1000 for k, v in pct.items()})
+        for (disease, name), count, total, buckets, pct in sorted(items)
+    ]
+
+
+def prometheus_text():
+    lines = [
+        "# HELP mdds_stage_seconds Time spent in each prediction stage.",
+        "# TYPE mdds_stage_seconds histogram",
+    ]
+    for row in snapshot():
+        labels = f'disease="{row["disease"]}",stage="{row["stage"]}"'
+        cumulative = 0
+        for le, n in row["buckets"].items():
+            cumulative += n
+            lines.append(f'mdds_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"mdds_stage_seconds_sum{{{labels}}} {row['sum_seconds']:.6f}")
+        lines.append(f"mdds_stage_seconds_count{{{labels}}} {row['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_json(path):
+    tmp_path = f"{path}.{os.getpid()}.part"
+    with open(tmp_path, "w") as f:
+        json.dump({"generated_at": time.time(), "pid": os.getpid(), "stages": snapshot()}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _flush_loop(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            write_json(path)
+        except OSError:
+            pass
+
+
+def _serve(port):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            status = 200
+            if path == "/ready":
+                # Same port also answers load balancer readiness probes:
+                # 503 until model warm-up has finished (see warmup.py).
+                import warmup
+                status = 200 if warmup.is_ready() else 503
+                body, content_type = json.dumps(warmup.readiness()).encode(), "application/json"
+            elif path == "/metrics.json":
+                body, content_type = json.dumps(snapshot()).encode(), "application/json"
+            elif path == "/metrics":
+                body, content_type = prometheus_text().encode(), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    except OSError:
+        return  # another worker on this host already serves the port
+    server.serve_forever()
+
+
+def _start_exporters():
+    # Called under _lock on the first observation of the process.
+    global _exporters_started
+    if _exporters_started:
+        return
+    _exporters_started = True
+    if settings.METRICS_JSON_PATH:
+        threading.Thread(target=_flush_loop, args=(settings.METRICS_JSON_PATH, settings.METRICS_FLUSH_SECONDS),
+                         name="metrics-flush", daemon=True).start()
+    start_http_server()
+
+
+def start_http_server():
+    # /metrics, /metrics.json and /ready on MDDS_METRICS_PORT; idempotent.
+    global _http_started
+    with _http_lock:
+        if not settings.METRICS_PORT or _http_started:
+            return
+        _http_started = True
+    threading.Thread(target=_serve, args=(settings.METRICS_PORT,), name="metrics-http", daemon=True).start()
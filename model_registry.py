@@ -0,0 +1,147 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import namedtuple
+
+import settings
+from artifact_cache import fetch_artifact, sha256_file
+from diseases import DISEASES
+
+# ===================== MODEL REGISTRY =====================
+# Process-wide: every page (app.py and pages/*.py) and every worker thread
+# gets the same objects, and each artifact is unpickled at most once.
+LoadedModel = namedtuple("LoadedModel", ["key", "model", "scaler", "features", "load_seconds", "memory_bytes", "file_bytes", "version", "backend"])
+
+BRAIN_KEY = "brain"
+BRAIN_MODEL_NAME = "brain_tumor_model.h5"
+
+_models = {}
+_lock = threading.RLock()
+
+
+def _estimate_bytes(obj):
+    # sklearn trees keep their nodes in malloc'd buffers that tracemalloc and
+    # sys.getsizeof cannot see; the pickled state is a close proxy for them.
+    if obj is None:
+        return 0
+    if hasattr(obj, "memory_bytes"):
+        return obj.memory_bytes()
+    if hasattr(obj, "count_params"):
+        return obj.count_params() * 4
+    return len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _fingerprint(path):
+    # (content hash, bytes) of a file, or of every file in an artifact
+    # directory such as a memory-mapped compiled model.
+    if not os.path.isdir(path):
+        return sha256_file(path), os.path.getsize(path)
+    files = sorted(os.listdir(path))
+    digest = hashlib.sha256()
+    for name in files:
+        digest.update(f"{name}:{sha256_file(os.path.join(path, name))}".encode())
+    return digest.hexdigest(), sum(os.path.getsize(os.path.join(path, name)) for name in files)
+
+
+def _measure(loader):
+    start = time.perf_counter()
+    model, scaler, features, path = loader()
+    elapsed = time.perf_counter() - start
+    return (model, scaler, features, path), elapsed, _estimate_bytes(model) + _estimate_bytes(scaler)
+
+
+def load_pickle_artifact(spec):
+    with open(spec["model_path"], "rb") as f:
+        data = pickle.load(f)
+    if isinstance(data, tuple):
+        model, scaler = data
+        features = spec["features"]
+    else:
+        model = data["model"]
+        scaler = data["scaler"]
+        features = data.get("features", spec["features"])
+    return model, scaler, list(features)
+
+
+def _check_classes(key, model):
+    # A wrong positive_classes entry would silently invert results.
+    missing = set(DISEASES[key]["positive_classes"]) - set(model.classes_.tolist())
+    if missing:
+        raise ValueError(f"{key}: positive_classes {sorted(missing)} not in model classes {model.classes_.tolist()}")
+
+
+def _load_tabular(key, backend):
+    spec = DISEASES[key]
+    if backend == "compiled":
+        from compiled_models import ensure_compiled, load_compiled
+        try:
+            path = ensure_compiled(key)
+            return load_compiled(path) + (path,)
+        except TypeError:
+            pass  # estimator type the compiler does not know; serve the pickle
+    return load_pickle_artifact(spec) + (spec["model_path"],)
+
+
+def brain_model_path():
+    return fetch_artifact(BRAIN_MODEL_NAME, settings.BRAIN_MODEL_URL, settings.BRAIN_MODEL_SHA256 or None)
+
+
+def load_keras_brain_model(path=None):
+    from tensorflow.keras.models import load_model
+    return load_model(path or brain_model_path())
+
+
+def _load_brain(backend):
+    if backend == "tflite":
+        from brain_backends import load_tflite_backend
+        source = brain_model_path()
+        model = load_tflite_backend(source, lambda: load_keras_brain_model(source))
+        return model, None, None, model.path
+    return load_keras_brain_model(), None, None, os.path.join(settings.MODEL_CACHE_DIR, BRAIN_MODEL_NAME)
+
+
+def get_model(key, backend=None):
+    # backend defaults to settings.TABULAR_BACKEND / settings.BRAIN_BACKEND;
+    # each (model, backend) pair is loaded once.
+    if backend is None:
+        backend = settings.BRAIN_BACKEND if key == BRAIN_KEY else settings.TABULAR_BACKEND
+    loaded = _models.get((key, backend))
+    if loaded is not None:
+        return loaded
+    with _lock:
+        loaded = _models.get((key, backend))
+        if loaded is None:
+            loader = _load_brain if key == BRAIN_KEY else (lambda b: _load_tabular(key, b))
+            (model, scaler, features, path), seconds, memory = _measure(lambda: loader(backend))
+            if key != BRAIN_KEY:
+                _check_classes(key, model)
+            # Content hash of the served file; keys caches so a swapped
+            # artifact never serves stale results.
+            digest, file_bytes = _fingerprint(path)
+            loaded = LoadedModel(key, model, scaler, features, seconds, memory, file_bytes, digest[:12], backend)
+            _models[(key, backend)] = loaded
+    return loaded
+
+
+def registry_report():
+    return [
+        {
+            "model": m.key,
+            "backend": m.backend,
+            "version": m.version,
+            "load_seconds": round(m.load_seconds, 4),
+            "memory_mb": round(m.memory_bytes / 1e6, 2),
+            "file_mb": round(m.file_bytes / 1e6, 2),
+        }
+        for m in _models.values()
+    ]
+
+
+if __name__ == "__main__":
+    for key in DISEASES:
+        get_model(key)
+    for row in registry_report():
+        print(f"{row['model']:<10} load {row['load_seconds']*1000:8.1f} ms   "
+              f"memory {row['memory_mb']:7.2f} MB   file {row['file_mb']:6.2f} MB")
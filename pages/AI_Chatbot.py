@@ -1,5 +1,6 @@
 import streamlit as st
-import google.generativeai as genai
+import settings
+from chat_client import build_context, get_client
 
 # ------------------- Page Config -------------------
 st.set_page_config(page_title="AI Health Assistant", page_icon="🤖")
@@ -10,26 +11,30 @@ st.write("Ask questions about symptoms, diseases, reports, or prevention.")
 # ------------------- Load API Key -------------------
 # Make sure you have .streamlit/secrets.toml with:
 # GEMINI_API_KEY = "YOUR_ACTUAL_API_KEY_HERE"
-api_key = st.secrets.get("GEMINI_API_KEY")
-if not api_key:
+# (not needed with MDDS_CHAT_BACKEND=fake)
+api_key = st.secrets.get("GEMINI_API_KEY") if settings.CHAT_BACKEND == "gemini" else None
+if settings.CHAT_BACKEND == "gemini" and not api_key:
     st.error("GEMINI_API_KEY not found in secrets.toml")
     st.stop()
 
-# ------------------- Configure Gemini -------------------
-genai.configure(api_key=api_key)
-
-# Use a valid model
-model = genai.GenerativeModel("models/gemini-2.0-flash")
-
-# ------------------- Initialize Chat -------------------
-if "chat" not in st.session_state:
-    st.session_state.chat = model.start_chat(history=[])
+# ------------------- Chat Client -------------------
+# Stateless client: each turn sends a bounded context window built from
+# st.session_state.messages, so requests stop growing with the conversation.
+if "chat_client" not in st.session_state:
+    st.session_state.chat_client = get_client(api_key=api_key)
 
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
 # ------------------- Display Chat History -------------------
-for msg in st.session_state.messages:
+# Only the most recent messages are drawn on each rerun.
+messages = st.session_state.messages
+hidden = max(0, len(messages) - settings.CHAT_RENDER_MESSAGES)
+if hidden and not st.toggle(f"Show {hidden} earlier messages"):
+    visible = messages[hidden:]
+else:
+    visible = messages
+for msg in visible:
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
 
@@ -38,19 +43,20 @@ user_input = st.chat_input("Ask your health question...")
 
 if user_input:
     # Show user message
-    st.session_state.messages.append({"role": "user", "content": user_input})
     with st.chat_message("user"):
         st.markdown(user_input)
 
-    # Send message to Gemini
-    try:
-        response = st.session_state.chat.send_message(user_input)
-        reply = response.text
-    except Exception as e:
-        # Catch any error (quota, 403, 404, etc.)
-        reply = f"⚠️ Error: {e}"
-
-    # Show assistant response
-    st.session_state.messages.append({"role": "assistant", "content": reply})
+    # Stream the reply from Gemini into the bubble as it arrives
+    system, history = build_context(messages)
     with st.chat_message("assistant"):
-        st.markdown(reply)
+        try:
+            reply = st.write_stream(st.session_state.chat_client.stream(system, history, user_input))
+        except Exception as e:
+            # Catch any error (quota, 403, 404, etc.)
+            reply = f"⚠️ Error: {e}"
+            st.markdown(reply)
+
+    messages.append({"role": "user", "content": user_input})
+    messages.append({"role": "assistant", "content": reply if isinstance(reply, str) else "".join(map(str, reply))})
+    # Bound what each session keeps in memory
+    del messages[:-settings.CHAT_HISTORY_LIMIT]
@@ -1,29 +1,19 @@
 import streamlit as st
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-from PIL import Image
-import requests
-from io import BytesIO
+import hashlib
+import settings
+from brain_pipeline import open_upload, preprocess_upload
+from model_registry import BRAIN_KEY, get_model
+import thresholds
+import audit
 
 # ================= PAGE CONFIG =================
 st.set_page_config(page_title="Brain Tumor Prediction", layout="centered")
 st.title("🧠 Brain Tumor Prediction")
 
 # ================= LOAD MODEL =================
-@st.cache_resource
-def load_brain_model():
-    FILE_ID = "1r7Kmf14ZGKQK3GSTk3nxPxfAyGpg2m_b"
-    URL = f"https://drive.google.com/uc?id={FILE_ID}&export=download"
-    
-    response = requests.get(URL)
-    with open("brain_tumor_dataset.h5", "wb") as f:
-        f.write(response.content)
-    
-    model = load_model("brain_tumor_dataset.h5")
-    return model
-
-model = load_brain_model()
+loaded = get_model(BRAIN_KEY)
+model = loaded.model
 
 # Show model input shape for debugging
 st.write("Model input shape:", model.input_shape)
@@ -33,35 +23,28 @@ st.subheader("Upload MRI Image")
 uploaded_file = st.file_uploader("Choose an image...", type=["jpg", "jpeg", "png"])
 
 if uploaded_file is not None:
-    image = Image.open(uploaded_file).convert("RGB")
+    data = uploaded_file.getvalue()
+    image = open_upload(data, (settings.BRAIN_PREVIEW_PX, settings.BRAIN_PREVIEW_PX))
     st.image(image, caption="Uploaded MRI", use_column_width=True)
 
     # ================= PREPROCESS IMAGE =================
     # Get model input shape (ignore batch size)
     input_shape = model.input_shape[1:]  # e.g., (86528,) or (128,128,3)
-    
-    if len(input_shape) == 1:
-        # Dense model expecting flattened input
-        # Calculate the side of square image if needed
-        side = int(np.sqrt(input_shape[0] / 3))
-        img = image.resize((side, side))
-        img_array = np.array(img) / 255.0
-        img_array = img_array.flatten()
-        img_array = np.expand_dims(img_array, axis=0)
-    else:
-        # CNN model expecting (H, W, C)
-        img = image.resize((input_shape[0], input_shape[1]))
-        img_array = np.array(img) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
+    # float32, draft-decoded, cached by upload hash across reruns
+    img_array = preprocess_upload(data, input_shape)[np.newaxis]
 
     # ================= PREDICTION =================
     if st.button("🔍 Predict Brain Tumor"):
         try:
             prediction = model.predict(img_array)[0][0]
-            if prediction > 0.5:
-                st.error("⚠️ Brain Tumor Detected")
+            if thresholds.brain_detected(prediction):
+                result_text = "⚠️ Brain Tumor Detected"
+                st.error(result_text)
             else:
-                st.success("✅ No Brain Tumor Detected")
+                result_text = "✅ No Brain Tumor Detected"
+                st.success(result_text)
+            audit.record(st.session_state.get("current_user"), BRAIN_KEY, {"image_sha256": hashlib.sha256(data).hexdigest()},
+                         result_text, loaded.version, score=prediction, source="pages/Brain.py")
         except Exception as e:
             st.error("Prediction failed")
             st.code(str(e))
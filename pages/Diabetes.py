@@ -1,29 +1,17 @@
 import streamlit as st
 import numpy as np
-import pickle
+from model_registry import get_model
+from screening import fired_rules
+import thresholds
+import drift
+import audit
 
 st.set_page_config(page_title="Diabetes Prediction", layout="centered")
 st.title("🩸 Diabetes Prediction (8 Features)")
 
-# ================= SAFE MODEL LOADER =================
-@st.cache_resource
-def load_model():
-    with open("models/diabetes_model.pkl", "rb") as f:
-        data = pickle.load(f)
-    # Handle both tuple and dict formats
-    if isinstance(data, tuple):
-        model, scaler = data
-        features = [
-            "Pregnancies", "Glucose", "BloodPressure", "SkinThickness",
-            "Insulin", "BMI", "DiabetesPedigreeFunction", "Age"
-        ]
-    else:
-        model = data["model"]
-        scaler = data["scaler"]
-        features = data["features"]
-    return model, scaler, features
-
-model, scaler, FEATURES = load_model()
+# ================= SHARED MODEL REGISTRY =================
+loaded = get_model("diabetes")
+model, scaler, FEATURES = loaded.model, loaded.scaler, loaded.features
 
 # ================= INPUTS =================
 st.subheader("Enter Patient Details")
@@ -40,19 +28,26 @@ age = st.number_input("Age", 1, 120, value=32)
 # ================= PREDICTION =================
 if st.button("🔍 Predict Diabetes"):
     try:
+        # Prepare input for model
+        X_input = np.array([[preg, glucose, bp, skin, insulin, bmi, dpf, age]])
+        drift.observe("diabetes", X_input[0])
         # Rule-based alert for obvious risk
-        if glucose > 180 or bmi > 40 or insulin > 300:
-            st.error("⚠️ Possible Diabetes Detected (Rule-Based Alert)")
+        fired = fired_rules("diabetes", X_input[0])
+        if fired:
+            prediction, result_text = None, "⚠️ Possible Diabetes Detected (Rule-Based Alert)"
+            st.error(result_text)
         else:
-            # Prepare input for model
-            X_input = np.array([[preg, glucose, bp, skin, insulin, bmi, dpf, age]])
             X_scaled = scaler.transform(X_input)
-            prediction = model.predict(X_scaled)[0]
+            prediction = thresholds.predict("diabetes", model, X_scaled)[0]
 
-            if prediction == 1:
-                st.error("⚠️ Diabetes Detected")
+            if thresholds.is_positive("diabetes", prediction):
+                result_text = "⚠️ Diabetes Detected"
+                st.error(result_text)
             else:
-                st.success("✅ No Diabetes Detected")
+                result_text = "✅ No Diabetes Detected"
+                st.success(result_text)
+        audit.record(st.session_state.get("current_user"), "diabetes", X_input[0], result_text, loaded.version,
+                     prediction=prediction, rules=fired, source="pages/Diabetes.py")
 
     except Exception as e:
         st.error("Prediction failed")
@@ -1,30 +1,17 @@
 import streamlit as st
 import numpy as np
-import pickle
+from model_registry import get_model
+from screening import fired_rules
+import thresholds
+import drift
+import audit
 
 st.set_page_config(page_title="Heart Disease Prediction", layout="centered")
 st.title("❤️ Heart Disease Prediction (13 Features)")
 
-# ================= SAFE MODEL LOADER =================
-@st.cache_resource
-def load_model():
-    with open("models/heart_model.pkl", "rb") as f:
-        data = pickle.load(f)
-    # Handle both tuple and dict formats
-    if isinstance(data, tuple):
-        model, scaler = data
-        features = [
-            "Age", "Sex", "Chest pain type", "BP", "Cholesterol",
-            "FBS over 120", "EKG results", "Max HR", "Exercise angina",
-            "ST depression", "Slope of ST", "Number of vessels fluro", "Thallium"
-        ]
-    else:
-        model = data["model"]
-        scaler = data["scaler"]
-        features = data["features"]
-    return model, scaler, features
-
-model, scaler, FEATURES = load_model()
+# ================= SHARED MODEL REGISTRY =================
+loaded = get_model("heart")
+model, scaler, FEATURES = loaded.model, loaded.scaler, loaded.features
 
 # ================= INPUTS =================
 st.subheader("Enter Patient Details")
@@ -46,20 +33,27 @@ thal = st.number_input("Thalassemia (1 = normal, 2 = fixed defect, 3 = reversibl
 # ================= PREDICTION =================
 if st.button("🔍 Predict Heart Disease"):
     try:
+        # Prepare input for model
+        X_input = np.array([[age, sex, cp, trestbps, chol, fbs, restecg,
+                             thalach, exang, oldpeak, slope, ca, thal]])
+        drift.observe("heart", X_input[0])
         # Quick rule-based alert for obvious risk
-        if chol > 300 or trestbps > 160 or thalach < 100:
-            st.error("⚠️ Possible Heart Disease Detected (Rule-Based Alert)")
+        fired = fired_rules("heart", X_input[0])
+        if fired:
+            prediction, result_text = None, "⚠️ Possible Heart Disease Detected (Rule-Based Alert)"
+            st.error(result_text)
         else:
-            # Prepare input for model
-            X_input = np.array([[age, sex, cp, trestbps, chol, fbs, restecg,
-                                 thalach, exang, oldpeak, slope, ca, thal]])
             X_scaled = scaler.transform(X_input)
-            prediction = model.predict(X_scaled)[0]
+            prediction = thresholds.predict("heart", model, X_scaled)[0]
 
-            if prediction == 1:
-                st.error("⚠️ Heart Disease Detected")
+            if thresholds.is_positive("heart", prediction):
+                result_text = "⚠️ Heart Disease Detected"
+                st.error(result_text)
             else:
-                st.success("✅ No Heart Disease Detected")
+                result_text = "✅ No Heart Disease Detected"
+                st.success(result_text)
+        audit.record(st.session_state.get("current_user"), "heart", X_input[0], result_text, loaded.version,
+                     prediction=prediction, rules=fired, source="pages/Heart.py")
 
     except Exception as e:
         st.error("Prediction failed")
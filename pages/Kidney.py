@@ -1,21 +1,17 @@
 import streamlit as st
 import numpy as np
-import pickle
+from model_registry import get_model
+from screening import fired_rules
+import thresholds
+import drift
+import audit
 
 st.set_page_config(page_title="Kidney Disease Prediction", layout="centered")
 st.title("🩺 Kidney Disease Prediction (10 Features)")
 
-# ================= SAFE MODEL LOADER =================
-@st.cache_resource
-def load_model():
-    with open("models/kidney_10f_model.pkl", "rb") as f:
-        data = pickle.load(f)
-    model = data["model"]
-    scaler = data["scaler"]
-    features = data["features"]
-    return model, scaler, features
-
-model, scaler, FEATURES = load_model()
+# ================= SHARED MODEL REGISTRY =================
+loaded = get_model("kidney")
+model, scaler, FEATURES = loaded.model, loaded.scaler, loaded.features
 
 # ================= INPUTS =================
 st.subheader("Enter Patient Details")
@@ -34,19 +30,26 @@ pcv = st.number_input("Packed Cell Volume (PCV)", 0, 60, value=44)
 # ================= PREDICTION =================
 if st.button("🔍 Predict Kidney Disease"):
     try:
+        # Prepare input for model
+        X_input = np.array([[age, bp, sg, al, su, bgr, bu, sc, hemo, pcv]])
+        drift.observe("kidney", X_input[0])
         # Rule-based safety check for obvious CKD
-        if bu > 90 or sc > 5 or hemo < 10 or pcv < 28:
-            st.error("⚠️ Chronic Kidney Disease Detected (Rule-Based Alert)")
+        fired = fired_rules("kidney", X_input[0])
+        if fired:
+            prediction, result_text = None, "⚠️ Chronic Kidney Disease Detected (Rule-Based Alert)"
+            st.error(result_text)
         else:
-            # Prepare input for model
-            X_input = np.array([[age, bp, sg, al, su, bgr, bu, sc, hemo, pcv]])
             X_scaled = scaler.transform(X_input)
-            prediction = model.predict(X_scaled)[0]
+            prediction = thresholds.predict("kidney", model, X_scaled)[0]
 
-            if prediction == 1:
-                st.error("⚠️ Chronic Kidney Disease Detected")
+            if thresholds.is_positive("kidney", prediction):
+                result_text = "⚠️ Chronic Kidney Disease Detected"
+                st.error(result_text)
             else:
-                st.success("✅ No Chronic Kidney Disease Detected")
+                result_text = "✅ No Chronic Kidney Disease Detected"
+                st.success(result_text)
+        audit.record(st.session_state.get("current_user"), "kidney", X_input[0], result_text, loaded.version,
+                     prediction=prediction, rules=fired, source="pages/Kidney.py")
 
     except Exception as e:
         st.error("Prediction failed")
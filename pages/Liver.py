@@ -1,31 +1,17 @@
 import streamlit as st
 import numpy as np
-import pickle
+from model_registry import get_model
+from screening import fired_rules
+import thresholds
+import drift
+import audit
 
 st.set_page_config(page_title="Liver Disease Prediction", layout="centered")
 st.title("🧬 Liver Disease Prediction (10 Features)")
 
-# ================= SAFE MODEL LOADER =================
-@st.cache_resource
-def load_model():
-    with open("models/liver_model.pkl", "rb") as f:
-        data = pickle.load(f)
-    # Handle both tuple and dict formats
-    if isinstance(data, tuple):
-        model, scaler = data
-        features = [
-            "Age", "Gender", "Total_Bilirubin", "Direct_Bilirubin",
-            "Alkaline_Phosphotase", "Alamine_Aminotransferase",
-            "Aspartate_Aminotransferase", "Total_Proteins",
-            "Albumin", "Albumin_and_Globulin_Ratio"
-        ]
-    else:
-        model = data["model"]
-        scaler = data["scaler"]
-        features = data["features"]
-    return model, scaler, features
-
-model, scaler, FEATURES = load_model()
+# ================= SHARED MODEL REGISTRY =================
+loaded = get_model("liver")
+model, scaler, FEATURES = loaded.model, loaded.scaler, loaded.features
 
 # ================= INPUTS =================
 st.subheader("Enter Patient Details")
@@ -45,20 +31,27 @@ ag_ratio = st.number_input("Albumin/Globulin Ratio", 0.0, 3.0, value=0.9)
 # ================= PREDICTION =================
 if st.button("🔍 Predict Liver Disease"):
     try:
+        # Prepare input for model
+        X_input = np.array([[age, gender_val, total_bilirubin, direct_bilirubin,
+                             alk_phos, alt, ast, total_proteins, albumin, ag_ratio]])
+        drift.observe("liver", X_input[0])
         # Rule-based alert for obvious liver risk
-        if total_bilirubin > 3 or direct_bilirubin > 1.5 or alt > 200 or ast > 200:
-            st.error("⚠️ Possible Liver Disease Detected (Rule-Based Alert)")
+        fired = fired_rules("liver", X_input[0])
+        if fired:
+            prediction, result_text = None, "⚠️ Possible Liver Disease Detected (Rule-Based Alert)"
+            st.error(result_text)
         else:
-            # Prepare input for model
-            X_input = np.array([[age, gender_val, total_bilirubin, direct_bilirubin,
-                                 alk_phos, alt, ast, total_proteins, albumin, ag_ratio]])
             X_scaled = scaler.transform(X_input)
-            prediction = model.predict(X_scaled)[0]
+            prediction = thresholds.predict("liver", model, X_scaled)[0]
 
-            if prediction == 1:
-                st.error("⚠️ Liver Disease Detected")
+            if thresholds.is_positive("liver", prediction):
+                result_text = "⚠️ Liver Disease Detected"
+                st.error(result_text)
             else:
-                st.success("✅ No Liver Disease Detected")
+                result_text = "✅ No Liver Disease Detected"
+                st.success(result_text)
+        audit.record(st.session_state.get("current_user"), "liver", X_input[0], result_text, loaded.version,
+                     prediction=prediction, rules=fired, source="pages/Liver.py")
 
     except Exception as e:
         st.error("Prediction failed")
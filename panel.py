@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import drift
+import inference_service
+import thresholds
+from diseases import DISEASES
+from screening import fired_rules
+
+# ===================== FULL PANEL =====================
+# One patient, all four tabular models. The page collects every field once
+# (panel_inputs() in app.py); PANEL_FIELDS maps those fields onto each
+# model's feature order, so age / sex / diastolic BP / glucose are entered a
+# single time.
+# Kept apart on purpose: heart "BP" is resting systolic, diabetes/kidney BP
+# is diastolic; kidney "al" is a urine dipstick grade, liver "Albumin" is
+# serum g/dL.
+PANEL_FIELDS = {
+    "heart": ["age", "sex", "chest_pain", "resting_bp", "cholesterol", "fbs", "rest_ecg",
+              "max_hr", "exercise_angina", "st_depression", "st_slope", "vessels", "thal"],
+    "diabetes": ["pregnancies", "glucose", "diastolic_bp", "skin_thickness", "insulin", "bmi", "dpf", "age"],
+    "kidney": ["age", "diastolic_bp", "specific_gravity", "urine_albumin", "urine_sugar", "glucose",
+               "blood_urea", "serum_creatinine", "hemoglobin", "pcv"],
+    "liver": ["age", "sex", "total_bilirubin", "direct_bilirubin", "alk_phos", "alt", "ast",
+              "total_proteins", "serum_albumin", "ag_ratio"],
+}
+
+# One thread per model; each call waits on its model's micro-batch queue.
+_pool = ThreadPoolExecutor(max_workers=len(PANEL_FIELDS), thread_name_prefix="panel")
+
+
+def disease_inputs(values):
+    return {key: [values[field] for field in fields] for key, fields in PANEL_FIELDS.items()}
+
+
+def _score(key, inputs):
+    start = time.perf_counter()
+    drift.observe(key, inputs)
+    fired = fired_rules(key, inputs)
+    prediction = DISEASES[key]["positive_classes"][0] if fired else inference_service.predict_tabular(key, inputs)
+    return {"prediction": prediction, "fired": fired, "seconds": time.perf_counter() - start}
+
+
+def run_panel(values, concurrent=True):
+    # Returns ({disease: {"prediction", "fired", "seconds"}}, timing).
+    # concurrent=False scores the models one after another, as four separate
+    # pages would; benchmarks.py (suite "panel") compares the two.
+    inputs = disease_inputs(values)
+    start = time.perf_counter()
+    if concurrent:
+        futures = {key: _pool.submit(_score, key, row) for key, row in inputs.items()}
+        results = {key: future.result() for key, future in futures.items()}
+    else:
+        results = {key: _score(key, row) for key, row in inputs.items()}
+    return results, {"wall_seconds": time.perf_counter() - start}
+
+
+def result_text(key, result):
+    label = DISEASES[key]["label"]
+    if result["fired"]:
+        return f"⚠️ {label} Detected (Rule-Based Alert: {'; '.join(result['fired'])})"
+    if thresholds.is_positive(key, result["prediction"]):
+        return f"⚠️ {label} Detected"
+    return f"✅ No {label} Detected"
@@ -0,0 +1,123 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+
+# ===================== PDF REPORTS =====================
+# Everything is rendered in memory: MRI images are embedded from a BytesIO
+# buffer (no shared temp file, so concurrent sessions cannot see each
+# other's scans) and the page header/footer come from one ReportPDF class
+# built on first use. fpdf itself is only imported when a report is made.
+TITLE = "Multi Disease Diagnostic Report"
+IMAGE_WIDTH_MM = 150
+# 150 mm at ~150 dpi; larger scans are downsampled before JPEG encoding.
+IMAGE_MAX_PX = 900
+
+
+@lru_cache(maxsize=None)
+def _report_pdf_class():
+    from fpdf import FPDF
+
+    class ReportPDF(FPDF):
+        def header(self):
+            self.set_font("helvetica", "B", 16)
+            self.cell(0, 10, TITLE, new_x="LMARGIN", new_y="NEXT", align="C")
+            self.ln(5)
+
+        def footer(self):
+            self.set_y(-15)
+            self.set_font("helvetica", "I", 8)
+            self.cell(0, 10, f"Page {self.page_no()}", align="C")
+
+    return ReportPDF
+
+
+def _latin1(text):
+    # Core PDF fonts are latin-1 only; emoji in result texts are dropped.
+    return text.encode("latin1", "ignore").decode("latin1")
+
+
+def _image_buffer(image):
+    image = image.convert("RGB")
+    if max(image.size) > IMAGE_MAX_PX:
+        image = image.copy()
+        image.thumbnail((IMAGE_MAX_PX, IMAGE_MAX_PX))
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    buffer.seek(0)
+    return buffer
+
+
+def _new_pdf():
+    pdf = _report_pdf_class()()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    return pdf
+
+
+def _write_header_block(pdf, username, disease):
+    # Fixed label/value rows: plain cells, no line-breaking pass needed.
+    pdf.set_font("helvetica", size=12)
+    login_time = datetime.now().strftime("%d-%m-%Y %I:%M %p")
+    for label, value in (("Username", username), ("Login Time", login_time), ("Disease", disease)):
+        pdf.cell(35, 8, label)
+        pdf.cell(0, 8, _latin1(f": {value}"), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(3)
+
+
+def _write_result(pdf, result_text):
+    pdf.set_font("helvetica", size=12)
+    pdf.multi_cell(0, 8, _latin1(f"Prediction Result:\n{result_text}"), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(5)
+
+
+def _write_image(pdf, image, caption="Uploaded MRI Image:"):
+    pdf.set_font("helvetica", "B", 12)
+    pdf.cell(0, 10, caption, new_x="LMARGIN", new_y="NEXT")
+    pdf.image(_image_buffer(image), x=30, w=IMAGE_WIDTH_MM)
+    pdf.ln(10)
+
+
+# ===================== SINGLE / COMBINED =====================
+def create_pdf(username, disease, result_text, image=None):
+    pdf = _new_pdf()
+    _write_header_block(pdf, username, disease)
+    _write_result(pdf, result_text)
+    if image:
+        _write_image(pdf, image)
+    return bytes(pdf.output())
+
+
+def create_combined_pdf(username, results, image=None):
+    # results: list of (disease, result_text), one section per disease.
+    pdf = _new_pdf()
+    _write_header_block(pdf, username, ", ".join(disease for disease, _ in results))
+    for disease, result_text in results:
+        pdf.set_font("helvetica", "B", 13)
+        pdf.cell(0, 9, _latin1(disease), new_x="LMARGIN", new_y="NEXT")
+        _write_result(pdf, result_text)
+    if image:
+        _write_image(pdf, image)
+    return bytes(pdf.output())
+
+
+# ===================== BULK =====================
+def _render_job(job):
+    if "results" in job:
+        return create_combined_pdf(**job)
+    return create_pdf(**job)
+
+
+def render_reports_bulk(jobs, workers=None, chunksize=16, executor=None):
+    # jobs: dicts of create_pdf / create_combined_pdf keyword arguments
+    # (PIL images pickle fine). Returns PDF bytes in job order. Pass a
+    # long-lived ProcessPoolExecutor to avoid spawning one per call.
+    jobs = list(jobs)
+    if executor is not None:
+        return list(executor.map(_render_job, jobs, chunksize=chunksize))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 2:
+        return [_render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_job, jobs, chunksize=chunksize))
@@ -0,0 +1,87 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import settings
+
+# ===================== PREDICTION CACHE =====================
+# Process-wide LRU shared by every session. Streamlit reruns the page on each
+# click, so repeated "Predict" presses with the same inputs are served from
+# here instead of re-running the model and re-rendering the PDF.
+# Keys always include the model version, so a new artifact never returns
+# stale predictions.
+
+
+class PredictionCache:
+    def __init__(self, max_size=1024, ttl_seconds=3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            # Computed outside the lock; two sessions racing on the same key
+            # both compute once and the second put() simply wins.
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def quantize_inputs(values, decimals=None):
+    decimals = settings.PREDICTION_CACHE_DECIMALS if decimals is None else decimals
+    return tuple(round(float(v), decimals) for v in values)
+
+
+def tabular_key(disease, version, inputs):
+    return ("tabular", disease, version, quantize_inputs(inputs))
+
+
+def image_key(data, version):
+    return ("image", version, hashlib.sha256(data).hexdigest())
+
+
+prediction_cache = PredictionCache(settings.PREDICTION_CACHE_SIZE, settings.PREDICTION_CACHE_TTL)
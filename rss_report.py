@@ -0,0 +1,104 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+
+import numpy as np
+
+from diseases import DISEASES
+
+# ===================== PER-WORKER MEMORY =====================
+# Starts N worker processes side by side, each loading every tabular model
+# the way a Streamlit worker would and scoring a few rows, then reads each
+# worker's /proc/self/smaps_rollup while all of them are alive:
+#   python rss_report.py --workers 4                     # sklearn vs compiled
+#   python rss_report.py --workers 4 --backend sklearn   # one side only
+# rss  - resident pages, shared ones counted in full in every worker
+# pss  - shared pages split between the processes mapping them (what adds up)
+# uss  - private pages only (what one more worker costs)
+# "sklearn" serves the pickles in models/ (private copies per worker);
+# "compiled" serves the memory-mapped .npy artifacts from compiled_models.py.
+
+
+def memory_kb():
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[-1] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def _worker(backend, keys, loaded_barrier, results, index):
+    import model_registry
+    baseline = memory_kb()
+    rng = np.random.default_rng(index)
+    for key in keys:
+        loaded = model_registry.get_model(key, backend)
+        # Score enough rows to touch most of every tree.
+        X = rng.normal(0, 1, (2000, len(loaded.features))) * getattr(loaded.scaler, "scale_", 1.0) \
+            + getattr(loaded.scaler, "mean_", 0.0)
+        loaded.model.predict(loaded.scaler.transform(X))
+    loaded_barrier.wait()  # every worker is loaded: sharing is now visible
+    after = memory_kb()
+    loaded_barrier.wait()  # keep everyone alive until all have measured
+    results[index] = {"baseline": baseline, "loaded": after}
+
+
+def measure(backend, workers=4, keys=None):
+    keys = keys or list(DISEASES)
+    if backend == "compiled":
+        from compiled_models import ensure_compiled
+        for key in keys:
+            ensure_compiled(key)
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    with ctx.Manager() as manager:
+        results = manager.dict()
+        procs = [ctx.Process(target=_worker, args=(backend, keys, barrier, results, i)) for i in range(workers)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        return [results[i] for i in range(workers)]
+
+
+def summarize(per_worker):
+    out = {}
+    for metric in ("rss", "pss", "uss"):
+        models = [w["loaded"][metric] - w["baseline"][metric] for w in per_worker]
+        out[metric] = {
+            "total_mb": sum(w["loaded"][metric] for w in per_worker) / 1024,
+            "models_mb_per_worker": float(np.mean(models)) / 1024,
+        }
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-worker memory of the tabular models, pickles vs memory-mapped.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--backend", choices=["sklearn", "compiled"], action="append")
+    parser.add_argument("--json", help="also write the raw numbers here")
+    args = parser.parse_args(argv)
+
+    report = {}
+    print(f"{args.workers} workers; MB attributable to the models in one worker (after - before loading)")
+    print(f"{'backend':<10} {'rss':>8} {'pss':>8} {'uss':>8}   {'host pss total':>14}")
+    for backend in args.backend or ["sklearn", "compiled"]:
+        per_worker = measure(backend, args.workers)
+        summary = summarize(per_worker)
+        report[backend] = {"workers": per_worker, "summary": summary}
+        print(f"{backend:<10} " + " ".join(f"{summary[m]['models_mb_per_worker']:8.2f}" for m in ("rss", "pss", "uss"))
+              + f"   {summary['pss']['total_mb']:14.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import threading
+
+import numpy as np
+
+from diseases import DISEASES
+
+# ===================== RULE SCREENING =====================
+# Evaluates DISEASES[<disease>]["rules"] as NumPy masks over a batch
+# (rows x features, in spec feature order). Rule-positive rows are reported
+# as detected and never reach the model. NaN never triggers a rule.
+OPS = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal}
+
+
+def rule_names(key):
+    return [f"{feature} {op} {threshold:g}" for feature, op, threshold in DISEASES[key]["rules"]]
+
+
+def rule_masks(key, X):
+    # (n_rows, n_rules) boolean matrix: which rule fired for which row.
+    spec = DISEASES[key]
+    X = np.asarray(X, dtype=float).reshape(-1, len(spec["features"]))
+    masks = np.zeros((len(X), len(spec["rules"])), dtype=bool)
+    with np.errstate(invalid="ignore"):
+        for j, (feature, op, threshold) in enumerate(spec["rules"]):
+            OPS[op](X[:, spec["features"].index(feature)], threshold, out=masks[:, j])
+    return masks
+
+
+def screen(key, X):
+    # Row mask of rule-positive rows, plus the per-rule matrix for reporting.
+    masks = rule_masks(key, X)
+    return masks.any(axis=1), masks
+
+
+def fired_rules(key, inputs):
+    # Names of the rules a single patient triggers ([] = go to the model).
+    masks = rule_masks(key, [inputs])[0]
+    hits = [name for name, hit in zip(rule_names(key), masks) if hit]
+    rule_stats.update(key, masks[np.newaxis])
+    return hits
+
+
+def describe(key, masks):
+    # Per-row "rule; rule" strings for output columns ("" for no hit).
+    names = np.array(rule_names(key), dtype=object)
+    return ["; ".join(names[row]) for row in masks]
+
+
+# ===================== HIT COUNTS =====================
+class RuleStats:
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, masks):
+        with self._lock:
+            rows, flagged, hits = self._counts.get(key, (0, 0, np.zeros(masks.shape[1], dtype=np.int64)))
+            self._counts[key] = (rows + len(masks), flagged + int(masks.any(axis=1).sum()), hits + masks.sum(axis=0))
+
+    def report(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return [
+            {"disease": key, "rule": name, "hits": int(n), "rows": rows, "rows_flagged": flagged}
+            for key, (rows, flagged, hits) in counts.items()
+            for name, n in zip(rule_names(key), hits)
+        ]
+
+
+# Process-wide counters for the interactive paths (shown on the Metrics page).
+rule_stats = RuleStats()
@@ -0,0 +1,15 @@
+import sys
+
+import warmup
+
+# ===================== SERVER LAUNCHER =====================
+# `streamlit run app.py` only executes app.py when the first session opens.
+# This starts the model warm-up in the server process itself, then hands over
+# to the regular Streamlit CLI:
+#   python serve.py --server.port 8501
+# Extra arguments are passed to `streamlit run` unchanged.
+if __name__ == "__main__":
+    warmup.start_warmup()
+    from streamlit.web import cli as stcli
+    sys.argv = ["streamlit", "run", "app.py"] + sys.argv[1:]
+    sys.exit(stcli.main())
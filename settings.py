@@ -0,0 +1,100 @@
+import os
+
+from diseases import BASE_DIR, MODELS_DIR
+
+# ===================== SETTINGS =====================
+# Deployment knobs. Each one can be overridden with an MDDS_* environment
+# variable so workers can be tuned without touching the code.
+MODEL_CACHE_DIR = os.environ.get("MDDS_MODEL_CACHE_DIR", os.path.join(MODELS_DIR, "cache"))
+
+# Any http(s) URL works here, e.g. a local `python -m http.server` in tests.
+BRAIN_MODEL_URL = os.environ.get(
+    "MDDS_BRAIN_MODEL_URL",
+    "https://drive.google.com/uc?id=1r7Kmf14ZGKQK3GSTk3nxPxfAyGpg2m_b&export=download",
+)
+# Optional pin; when empty the first download is trusted and recorded.
+BRAIN_MODEL_SHA256 = os.environ.get("MDDS_BRAIN_MODEL_SHA256", "")
+
+# Brain MRI batch mode
+BRAIN_BATCH_SIZE = int(os.environ.get("MDDS_BRAIN_BATCH_SIZE", "32"))
+BRAIN_PREPROCESS_WORKERS = int(os.environ.get("MDDS_BRAIN_PREPROCESS_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# Preprocessed MRI tensors, keyed by upload hash + input shape (see brain_pipeline.py)
+BRAIN_PREPROCESS_CACHE_SIZE = int(os.environ.get("MDDS_BRAIN_PREPROCESS_CACHE_SIZE", "64"))
+BRAIN_PREVIEW_PX = int(os.environ.get("MDDS_BRAIN_PREVIEW_PX", "1024"))
+
+# Multi-slice volumes: slices that must be positive for a study-level finding
+BRAIN_VOLUME_MIN_SLICES = int(os.environ.get("MDDS_BRAIN_VOLUME_MIN_SLICES", "1"))
+
+# Brain inference backend: "keras" or "tflite" (see brain_backends.py)
+BRAIN_BACKEND = os.environ.get("MDDS_BRAIN_BACKEND", "keras")
+BRAIN_QUANTIZATION = os.environ.get("MDDS_BRAIN_QUANTIZATION", "dynamic")
+BRAIN_TFLITE_THREADS = int(os.environ.get("MDDS_BRAIN_TFLITE_THREADS", "0"))
+
+# Tabular backend for the app: "compiled" (numpy-only, see compiled_models.py)
+# or "sklearn". batch_predict.py picks its own with --backend.
+TABULAR_BACKEND = os.environ.get("MDDS_TABULAR_BACKEND", "compiled")
+
+# Process-wide prediction/PDF cache (see prediction_cache.py); TTL 0 = no expiry
+PREDICTION_CACHE_SIZE = int(os.environ.get("MDDS_PREDICTION_CACHE_SIZE", "1024"))
+PREDICTION_CACHE_TTL = float(os.environ.get("MDDS_PREDICTION_CACHE_TTL", "3600"))
+PREDICTION_CACHE_DECIMALS = int(os.environ.get("MDDS_PREDICTION_CACHE_DECIMALS", "6"))
+
+# Users / appointments database (see storage.py)
+DB_PATH = os.environ.get("MDDS_DB_PATH", os.path.join(BASE_DIR, "data", "mdds.db"))
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("MDDS_PASSWORD_HASH_ITERATIONS", "200000"))
+APPOINTMENTS_PAGE_SIZE = int(os.environ.get("MDDS_APPOINTMENTS_PAGE_SIZE", "10"))
+
+# Request coalescing across sessions (see inference_service.py)
+MICROBATCH_ENABLED = os.environ.get("MDDS_MICROBATCH", "1") == "1"
+MICROBATCH_MAX_BATCH_SIZE = int(os.environ.get("MDDS_MICROBATCH_MAX_BATCH_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get("MDDS_MICROBATCH_MAX_WAIT_MS", "1"))
+
+# Per-stage timing (see metrics.py); port 0 / empty path disable the exporters
+METRICS_ENABLED = os.environ.get("MDDS_METRICS", "1") == "1"
+METRICS_PORT = int(os.environ.get("MDDS_METRICS_PORT", "0"))
+METRICS_JSON_PATH = os.environ.get("MDDS_METRICS_JSON", "")
+METRICS_FLUSH_SECONDS = float(os.environ.get("MDDS_METRICS_FLUSH_SECONDS", "30"))
+# Usernames that may open the Metrics page, comma-separated; nobody by default.
+# Signup is open, so only list accounts that already exist.
+ADMIN_USERS = {name.strip() for name in os.environ.get("MDDS_ADMIN_USERS", "").split(",") if name.strip()}
+
+# Speech to text (see speech_pipeline.py): "google", "sphinx", "whisper"
+SPEECH_BACKEND = os.environ.get("MDDS_SPEECH_BACKEND", "google")
+SPEECH_CHUNK_SECONDS = float(os.environ.get("MDDS_SPEECH_CHUNK_SECONDS", "30"))
+SPEECH_OVERLAP_SECONDS = float(os.environ.get("MDDS_SPEECH_OVERLAP_SECONDS", "0.5"))
+SPEECH_WORKERS = int(os.environ.get("MDDS_SPEECH_WORKERS", "4"))
+
+# AI assistant (see chat_client.py): "gemini" or "fake" (offline, for tests)
+CHAT_BACKEND = os.environ.get("MDDS_CHAT_BACKEND", "gemini")
+CHAT_MODEL = os.environ.get("MDDS_CHAT_MODEL", "models/gemini-2.0-flash")
+CHAT_CONTEXT_MESSAGES = int(os.environ.get("MDDS_CHAT_CONTEXT_MESSAGES", "12"))
+CHAT_CONTEXT_CHARS = int(os.environ.get("MDDS_CHAT_CONTEXT_CHARS", "8000"))
+CHAT_HISTORY_LIMIT = int(os.environ.get("MDDS_CHAT_HISTORY_LIMIT", "200"))
+CHAT_RENDER_MESSAGES = int(os.environ.get("MDDS_CHAT_RENDER_MESSAGES", "30"))
+
+# Background model warm-up (see warmup.py); empty list = every model
+WARMUP_ENABLED = os.environ.get("MDDS_WARMUP", "0") == "1"
+WARMUP_MODELS = os.environ.get("MDDS_WARMUP_MODELS", "")
+
+# Per-disease operating thresholds written by evaluate.py (see thresholds.py)
+THRESHOLDS_PATH = os.environ.get("MDDS_THRESHOLDS_PATH", os.path.join(MODELS_DIR, "thresholds.json"))
+
+# Background brain inference (see jobs.py): threads, and how many jobs may be
+# queued or running before new ones are turned away
+BRAIN_JOB_WORKERS = int(os.environ.get("MDDS_BRAIN_JOB_WORKERS", "2"))
+BRAIN_JOB_QUEUE_LIMIT = int(os.environ.get("MDDS_BRAIN_JOB_QUEUE_LIMIT", "16"))
+
+# Input drift monitor (see drift.py)
+DRIFT_ENABLED = os.environ.get("MDDS_DRIFT", "1") == "1"
+DRIFT_DIR = os.environ.get("MDDS_DRIFT_DIR", os.path.join(BASE_DIR, "data", "drift"))
+DRIFT_FOLD_SECONDS = float(os.environ.get("MDDS_DRIFT_FOLD_SECONDS", "5"))
+DRIFT_FLUSH_SECONDS = float(os.environ.get("MDDS_DRIFT_FLUSH_SECONDS", "60"))
+
+# Prediction audit log (see audit.py)
+AUDIT_ENABLED = os.environ.get("MDDS_AUDIT", "1") == "1"
+AUDIT_DIR = os.environ.get("MDDS_AUDIT_DIR", os.path.join(BASE_DIR, "data", "audit"))
+AUDIT_FSYNC_SECONDS = float(os.environ.get("MDDS_AUDIT_FSYNC_SECONDS", "1"))
+AUDIT_BATCH_SIZE = int(os.environ.get("MDDS_AUDIT_BATCH_SIZE", "500"))
+AUDIT_MAX_BYTES = int(os.environ.get("MDDS_AUDIT_MAX_MB", "50")) * 1024 * 1024
+AUDIT_QUEUE_LIMIT = int(os.environ.get("MDDS_AUDIT_QUEUE_LIMIT", "10000"))
@@ -0,0 +1,137 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import settings
+
+# ===================== SPEECH TO TEXT =====================
+# Long dictations are split into ~30 s chunks, cut at the quietest point
+# near each boundary (or overlapped slightly when there is no pause), then
+# transcribed concurrently and stitched back in order. Everything stays in
+# memory: sr.AudioFile reads the upload from a BytesIO, no temp files.
+#   for done, total, text in transcribe_stream(wav_bytes): ...
+FRAME_SECONDS = 0.02
+
+
+# ===================== BACKENDS =====================
+# A backend takes one sr.AudioData chunk and returns its text. It raises
+# sr.UnknownValueError for unintelligible audio and sr.RequestError for
+# engine/API failures, like the recognize_* methods do.
+def _google(recognizer, audio):
+    return recognizer.recognize_google(audio)
+
+
+def _sphinx(recognizer, audio):
+    # Offline; needs pocketsphinx installed.
+    return recognizer.recognize_sphinx(audio)
+
+
+def _whisper(recognizer, audio):
+    # Offline; needs openai-whisper installed.
+    return recognizer.recognize_whisper(audio).strip()
+
+
+BACKENDS = {"google": _google, "sphinx": _sphinx, "whisper": _whisper}
+
+
+def register_backend(name, fn):
+    # e.g. register_backend("stub", lambda recognizer, audio: "hello")
+    BACKENDS[name] = fn
+
+
+# ===================== CHUNKING =====================
+def load_audio(data):
+    import speech_recognition as sr
+    with sr.AudioFile(io.BytesIO(data)) as source:
+        audio = sr.Recognizer().record(source)
+    # AudioFile already downmixes to mono; normalise to 16-bit samples.
+    samples = np.frombuffer(audio.get_raw_data(convert_width=2), dtype=np.int16)
+    return samples, audio.sample_rate
+
+
+def split_points(samples, sample_rate, chunk_seconds=None, overlap_seconds=None, search_seconds=5.0, silence_ratio=0.1):
+    # Returns (start, end) sample ranges covering the whole recording.
+    chunk_seconds = chunk_seconds or settings.SPEECH_CHUNK_SECONDS
+    overlap_seconds = settings.SPEECH_OVERLAP_SECONDS if overlap_seconds is None else overlap_seconds
+    # Each overlapped cut must still move forward by at least one frame.
+    if overlap_seconds < 0 or chunk_seconds <= overlap_seconds + FRAME_SECONDS:
+        raise ValueError(f"chunk_seconds ({chunk_seconds}) must exceed overlap_seconds ({overlap_seconds}) "
+                         f"by more than {FRAME_SECONDS}s")
+    chunk = int(chunk_seconds * sample_rate)
+    if len(samples) <= chunk:
+        return [(0, len(samples))]
+
+    frame = max(1, int(FRAME_SECONDS * sample_rate))
+    n_frames = len(samples) // frame
+    energy = np.sqrt(np.mean(samples[:n_frames * frame].astype(np.float64).reshape(n_frames, frame) ** 2, axis=1))
+    silence = silence_ratio * (np.median(energy) or 1.0)
+    search = int(search_seconds * sample_rate) // frame
+    overlap = int(overlap_seconds * sample_rate)
+
+    ranges, start = [], 0
+    while len(samples) - start > chunk:
+        target = (start + chunk) // frame
+        lo = max(start // frame + 1, target - search)
+        quietest = lo + int(np.argmin(energy[lo:target])) if target > lo else target
+        if energy[quietest] <= silence:
+            # Cut in the middle of the pause, no overlap needed.
+            end = quietest * frame + frame // 2
+            ranges.append((start, end))
+            start = end
+        else:
+            end = target * frame
+            ranges.append((start, end))
+            start = end - overlap
+    ranges.append((start, len(samples)))
+    return ranges
+
+
+def stitch(texts, overlapped=None, max_overlap_words=8):
+    # Drops words repeated across an overlapped boundary; overlapped[i] says
+    # whether chunk i shares audio with chunk i - 1 (default: all do).
+    words = []
+    for i, text in enumerate(texts):
+        new = text.split()
+        shared = overlapped is None or overlapped[i]
+        limit = min(max_overlap_words, len(words), len(new)) if shared else 0
+        for k in range(limit, 0, -1):
+            if [w.lower() for w in words[-k:]] == [w.lower() for w in new[:k]]:
+                new = new[k:]
+                break
+        words.extend(new)
+    return " ".join(words)
+
+
+# ===================== TRANSCRIBE =====================
+def transcribe_stream(data, backend=None, workers=None, chunk_seconds=None):
+    # Yields (chunks_done, chunks_total, text_so_far) in chunk order while the
+    # remaining chunks are still being transcribed. Raises sr.RequestError
+    # from the first failing chunk and sr.UnknownValueError if nothing at all
+    # was recognised.
+    import speech_recognition as sr
+    recognize = BACKENDS[backend or settings.SPEECH_BACKEND]
+    samples, rate = load_audio(data)
+    ranges = split_points(samples, rate, chunk_seconds)
+    overlapped = [False] + [start < prev_end for (_, prev_end), (start, _) in zip(ranges, ranges[1:])]
+    recognizer = sr.Recognizer()
+
+    def work(bounds):
+        audio = sr.AudioData(samples[bounds[0]:bounds[1]].tobytes(), rate, 2)
+        try:
+            return recognize(recognizer, audio)
+        except sr.UnknownValueError:
+            return ""
+
+    texts = []
+    with ThreadPoolExecutor(max_workers=workers or settings.SPEECH_WORKERS) as pool:
+        futures = [pool.submit(work, bounds) for bounds in ranges]
+        try:
+            for future in futures:
+                texts.append(future.result())
+                yield len(texts), len(ranges), stitch(texts, overlapped)
+        finally:
+            for future in futures:
+                future.cancel()
+    if not any(texts):
+        raise sr.UnknownValueError()
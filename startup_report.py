@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# ===================== STARTUP-TIME REPORT =====================
+# Every measurement runs in a fresh interpreter so nothing is already cached
+# in sys.modules. Import costs are marginal on top of BASELINE, which every
+# Streamlit worker has loaded anyway.
+#   python startup_report.py            # import cost per module
+#   python startup_report.py --app      # + first run of app.py (Signup page)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE = ["streamlit", "numpy"]
+LIGHT_MODULES = ["diseases", "settings", "artifact_cache", "model_registry"]
+HEAVY_MODULES = ["requests", "PIL.Image", "fpdf", "speech_recognition", "pandas", "sklearn.ensemble", "tensorflow.keras"]
+
+_IMPORT_SNIPPET = """
+import importlib, json, sys, time
+for name in {baseline!r}:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        pass
+start = time.perf_counter()
+try:
+    importlib.import_module({module!r})
+    error = None
+except Exception as e:
+    error = repr(e)
+print(json.dumps({{"seconds": time.perf_counter() - start, "error": error}}))
+"""
+
+_APP_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+ready = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+done = time.perf_counter()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"streamlit_seconds": ready - start, "first_run_seconds": done - ready,
+                  "heavy_modules_loaded": heavy, "exception": [str(e.value) for e in at.exception]}}))
+"""
+
+
+def _run(snippet):
+    out = subprocess.run([sys.executable, "-c", snippet], cwd=BASE_DIR,
+                         capture_output=True, text=True, check=False)
+    lines = out.stdout.strip().splitlines()
+    if not lines:
+        return {"error": out.stderr.strip().splitlines()[-1:] or ["no output"]}
+    return json.loads(lines[-1])
+
+
+def measure_import(module, baseline=BASELINE):
+    return _run(_IMPORT_SNIPPET.format(module=module, baseline=list(baseline)))
+
+
+def measure_app_first_run():
+    return _run(_APP_SNIPPET.format(heavy=[m.split(".")[0] for m in HEAVY_MODULES]))
+
+
+def build_report(include_app=False):
+    report = {"baseline": BASELINE, "imports": {}}
+    for module in BASELINE:
+        report["imports"][module] = measure_import(module, baseline=[])
+    for module in LIGHT_MODULES + HEAVY_MODULES:
+        report["imports"][module] = measure_import(module)
+    if include_app:
+        report["app"] = measure_app_first_run()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report import cost per module and app.py first-run time.")
+    parser.add_argument("--app", action="store_true", help="also time the first run of app.py via streamlit AppTest")
+    parser.add_argument("--json", help="write the raw report to this file")
+    args = parser.parse_args(argv)
+
+    report = build_report(include_app=args.app)
+    for module, result in report["imports"].items():
+        kind = "baseline" if module in BASELINE else "light" if module in LIGHT_MODULES else "heavy"
+        if result.get("error"):
+            print(f"{module:<20} {kind:<9} {'n/a':>10}   {result['error']}")
+        else:
+            print(f"{module:<20} {kind:<9} {result['seconds']*1000:8.1f} ms")
+    if "app" in report:
+        app = report["app"]
+        if "first_run_seconds" in app:
+            print(f"\napp.py first run (Signup): {app['first_run_seconds']*1000:.1f} ms, "
+                  f"heavy modules loaded: {app['heavy_modules_loaded'] or 'none'}")
+        else:
+            print(f"\napp.py first run failed: {app}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import hashlib
+import hmac
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import settings
+
+# ===================== PERSISTENT STORAGE =====================
+# Users and appointments in SQLite instead of st.session_state, so they
+# survive reloads and are shared by every session of the deployment.
+# One connection per process, serialised with a lock; WAL mode lets several
+# worker processes read while one writes.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username      TEXT PRIMARY KEY,
+    salt          BLOB NOT NULL,
+    password_hash BLOB NOT NULL,
+    created_at    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS appointments (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL REFERENCES users(username),
+    disease  TEXT NOT NULL,
+    doctor   TEXT NOT NULL,
+    link     TEXT NOT NULL,
+    time     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_appointments_user_time ON appointments(username, time DESC);
+"""
+
+_conn = None
+_lock = threading.RLock()
+
+
+def get_connection():
+    global _conn
+    if _conn is None:
+        with _lock:
+            if _conn is None:
+                db_dir = os.path.dirname(os.path.abspath(settings.DB_PATH))
+                os.makedirs(db_dir, exist_ok=True)
+                conn = sqlite3.connect(settings.DB_PATH, check_same_thread=False, timeout=30)
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(SCHEMA)
+                _conn = conn
+    return _conn
+
+
+# ===================== USERS =====================
+def _hash_password(password, salt):
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, settings.PASSWORD_HASH_ITERATIONS)
+
+
+def create_user(username, password):
+    salt = os.urandom(16)
+    # Hashed before taking the lock: PBKDF2 must not stall logins and saves.
+    password_hash = _hash_password(password, salt)
+    conn = get_connection()
+    with _lock:
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO users (username, salt, password_hash, created_at) VALUES (?, ?, ?, ?)",
+                    (username, salt, password_hash, datetime.now().isoformat(" ")),
+                )
+        except sqlite3.IntegrityError:
+            return False
+    return True
+
+
+def verify_user(username, password):
+    with _lock:
+        row = get_connection().execute(
+            "SELECT salt, password_hash FROM users WHERE username = ?", (username,)
+        ).fetchone()
+    if row is None:
+        return False
+    return hmac.compare_digest(_hash_password(password, row["salt"]), row["password_hash"])
+
+
+# ===================== APPOINTMENTS =====================
+def add_appointment(username, disease, doctor, link, time=None):
+    conn = get_connection()
+    with _lock, conn:
+        conn.execute(
+            "INSERT INTO appointments (username, disease, doctor, link, time) VALUES (?, ?, ?, ?, ?)",
+            (username, disease, doctor, link, time or str(datetime.now())),
+        )
+
+
+def count_appointments(username):
+    with _lock:
+        return get_connection().execute(
+            "SELECT COUNT(*) FROM appointments WHERE username = ?", (username,)
+        ).fetchone()[0]
+
+
+def get_appointments(username, page=1, page_size=10):
+    # Newest first; served straight from idx_appointments_user_time.
+    with _lock:
+        rows = get_connection().execute(
+            "SELECT disease, doctor, link, time FROM appointments WHERE username = ? "
+            "ORDER BY time DESC LIMIT ? OFFSET ?",
+            (username, page_size, (max(page, 1) - 1) * page_size),
+        ).fetchall()
+    return [dict(row) for row in rows]
@@ -0,0 +1,35 @@
+import os
+import pickle
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compiled_models  # noqa: E402
+import model_registry  # noqa: E402
+from diseases import DISEASES  # noqa: E402
+
+
+def write_model(path, features, seed=0, n_classes=2):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+    rng = np.random.default_rng(seed)
+    X = rng.normal(0, 1, (200, len(features)))
+    y = (X[:, 0] > 0).astype(int) if n_classes == 2 else np.digitize(X[:, 0], [-0.5, 0.5])
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=5, random_state=seed).fit(scaler.transform(X), y)
+    with open(path, "wb") as f:
+        pickle.dump({"model": model, "scaler": scaler, "features": features}, f)
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    # Own pickles, compiled directory and registry for every test.
+    monkeypatch.setattr(compiled_models, "COMPILED_DIR", str(tmp_path / "compiled"))
+    monkeypatch.setattr(model_registry, "_models", {})
+    for key, spec in DISEASES.items():
+        monkeypatch.setitem(spec, "model_path", str(tmp_path / f"{key}.pkl"))
+        write_model(spec["model_path"], spec["features"])
+    return tmp_path
@@ -0,0 +1,17 @@
+import pytest
+
+import brain_backends
+import settings
+
+
+def test_int8_is_not_exported_on_first_use(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_CACHE_DIR", str(tmp_path))
+    source = tmp_path / "brain_tumor_model.h5"
+    source.write_bytes(b"not a real model")
+
+    def keras_loader():
+        raise AssertionError("int8 must not be exported automatically")
+
+    with pytest.raises(FileNotFoundError, match="--quantize int8 --samples"):
+        brain_backends.load_tflite_backend(str(source), keras_loader, quantize="int8")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["brain_tumor_model.h5"]
@@ -0,0 +1,69 @@
+import multiprocessing as mp
+import os
+
+import numpy as np
+import pytest
+
+import compiled_models
+import model_registry
+from diseases import DISEASES
+from tests.conftest import write_model
+
+
+def test_replaced_pickle_is_recompiled(model_dir):
+    spec = DISEASES["heart"]
+    X = np.random.default_rng(1).normal(0, 1, (50, len(spec["features"])))
+    first = model_registry.get_model("heart", "compiled")
+    before = first.model.predict_proba(first.scaler.transform(X))
+
+    write_model(spec["model_path"], spec["features"], seed=7)
+    model_registry._models.clear()
+    second = model_registry.get_model("heart", "compiled")
+    after = second.model.predict_proba(second.scaler.transform(X))
+
+    assert second.version != first.version
+    assert not np.array_equal(before, after)
+    expected_model, expected_scaler, _ = model_registry.load_pickle_artifact(spec)
+    assert np.array_equal(after, expected_model.predict_proba(expected_scaler.transform(X)))
+    assert os.path.isdir(compiled_models.compiled_path("heart"))
+
+
+def test_compile_over_published_artifact(model_dir):
+    # The loser of a compile race keeps the published directory.
+    path = compiled_models.compile_artifact("heart")
+    assert compiled_models.compile_artifact("heart") == path
+    compiled_models.load_compiled(path)
+    assert [name for name in os.listdir(compiled_models.COMPILED_DIR) if name.startswith(".heart-")] == []
+
+
+def _load(key, queue):
+    try:
+        model, scaler, features = compiled_models.load_compiled(compiled_models.ensure_compiled(key))
+        queue.put(len(features))
+    except Exception as e:
+        queue.put(repr(e))
+
+
+@pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="needs fork")
+def test_concurrent_ensure_compiled(model_dir):
+    ctx = mp.get_context("fork")
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_load, args=("heart", queue)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    results = [queue.get(timeout=60) for _ in procs]
+    for p in procs:
+        p.join()
+    assert results == [len(DISEASES["heart"]["features"])] * 4
+    assert [name for name in os.listdir(compiled_models.COMPILED_DIR) if not name.startswith(".")] == \
+        [os.path.basename(compiled_models.compiled_path("heart"))]
+
+
+def test_old_versions_removed(model_dir):
+    spec = DISEASES["heart"]
+    paths = []
+    for seed in range(4):
+        write_model(spec["model_path"], spec["features"], seed=seed)
+        paths.append(compiled_models.ensure_compiled("heart"))
+        os.utime(paths[-1], (seed, seed))  # distinct mtimes
+    assert [os.path.isdir(p) for p in paths] == [False, False, True, True]
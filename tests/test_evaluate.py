@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import evaluate
+import settings
+from diseases import DISEASES
+
+
+def _labelled_csv(path, labels):
+    features = DISEASES["heart"]["features"]
+    frame = pd.DataFrame(np.random.default_rng(0).normal(0, 1, (len(labels), len(features))), columns=features)
+    frame["target"] = labels
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize("labels", [[0] * 40, [1] * 40])
+def test_save_threshold_needs_both_classes(model_dir, monkeypatch, labels):
+    monkeypatch.setattr(settings, "THRESHOLDS_PATH", str(model_dir / "thresholds.json"))
+    data = _labelled_csv(model_dir / "labelled.csv", labels)
+    with pytest.raises(SystemExit) as exit_info:
+        evaluate.main(["heart", data, "--save-threshold", "--quiet"])
+    assert exit_info.value.code != 0
+    assert not (model_dir / "thresholds.json").exists()
+
+
+def test_save_threshold(model_dir, monkeypatch):
+    monkeypatch.setattr(settings, "THRESHOLDS_PATH", str(model_dir / "thresholds.json"))
+    data = _labelled_csv(model_dir / "labelled.csv", [0, 1] * 20)
+    evaluate.main(["heart", data, "--save-threshold", "--quiet"])
+    assert (model_dir / "thresholds.json").exists()
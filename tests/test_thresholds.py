@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import model_registry
+import settings
+import thresholds
+from batch_predict import score_chunk
+from diseases import DISEASES
+
+# Real kidney model: classes [0, 1, 2], where 2 is "not CKD".
+KIDNEY_ROWS = np.array([
+    [40, 80, 1.020, 0, 0, 100, 30, 1.0, 15, 45],     # healthy
+    [25, 70, 1.025, 0, 0, 90, 20, 0.8, 16, 48],      # healthy
+    [60, 90, 1.010, 3, 2, 200, 100, 5, 9, 28],       # CKD
+    [55, 90, 1.015, 1, 0, 130, 50, 1.8, 11.5, 35],   # CKD
+])
+KIDNEY_CKD = np.array([False, False, True, True])
+
+
+@pytest.fixture
+def kidney(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "THRESHOLDS_PATH", str(tmp_path / "thresholds.json"))
+    monkeypatch.setattr(model_registry, "_models", {})
+    return model_registry.get_model("kidney", "sklearn")
+
+
+def test_kidney_positive_classes(kidney):
+    assert set(DISEASES["kidney"]["positive_classes"]) < set(kidney.model.classes_.tolist())
+    X = kidney.scaler.transform(KIDNEY_ROWS)
+    prediction = thresholds.predict("kidney", kidney.model, X)
+    assert np.array_equal(thresholds.is_positive("kidney", prediction), KIDNEY_CKD)
+    proba = thresholds.positive_proba("kidney", kidney.model, kidney.model.predict_proba(X))
+    assert np.all(proba[KIDNEY_CKD] > 0.5) and np.all(proba[~KIDNEY_CKD] < 0.5)
+
+
+def test_kidney_threshold(kidney):
+    proba = kidney.model.predict_proba(kidney.scaler.transform(KIDNEY_ROWS))
+    at_half = thresholds.apply_threshold("kidney", kidney.model, proba, threshold=0.5)
+    assert np.array_equal(thresholds.is_positive("kidney", at_half), KIDNEY_CKD)
+    # Above any probability: every row gets its best non-CKD label.
+    never = thresholds.apply_threshold("kidney", kidney.model, proba, threshold=1.1)
+    assert np.all(never == 2)
+
+
+def test_kidney_batch(kidney):
+    spec = DISEASES["kidney"]
+    chunk = pd.DataFrame(KIDNEY_ROWS, columns=spec["features"])
+    out = score_chunk(chunk, kidney.model, kidney.scaler, kidney.features, spec["positive_classes"], "kidney", rules=False)
+    assert np.array_equal(out["detected"].to_numpy(dtype=bool), KIDNEY_CKD)
+    assert np.all(out["probability"][KIDNEY_CKD] > 0.5) and np.all(out["probability"][~KIDNEY_CKD] < 0.5)
+
+
+def test_wrong_positive_classes_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "_models", {})
+    monkeypatch.setitem(DISEASES["kidney"], "positive_classes", [3])
+    with pytest.raises(ValueError):
+        model_registry.get_model("kidney", "sklearn")
@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+import settings
+from diseases import DISEASES
+from model_registry import BRAIN_KEY, get_model
+
+# ===================== OPERATING THRESHOLDS =====================
+# Per-disease decision thresholds on the positive-class probability (brain:
+# on the sigmoid score), chosen on labelled data by evaluate.py and stored in
+# models/thresholds.json:
+#   {"heart": {"threshold": 0.41, "criterion": "youden", ...}, ...}
+# A disease without an entry keeps the model's own decision (argmax of
+# predict_proba, i.e. model.predict; brain: score > 0.5). With an entry,
+# "detected" means probability >= threshold. The file is re-read when it
+# changes, so a new calibration needs no restart.
+BRAIN_DEFAULT_THRESHOLD = 0.5
+
+_cache = {"mtime": None, "data": {}}
+_lock = threading.Lock()
+
+
+def load_thresholds(path=None):
+    path = path or settings.THRESHOLDS_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    with _lock:
+        if _cache["mtime"] != mtime:
+            with open(path) as f:
+                _cache["data"] = json.load(f)
+            _cache["mtime"] = mtime
+        return _cache["data"]
+
+
+def get_threshold(key):
+    entry = load_thresholds().get(key)
+    return None if entry is None else float(entry["threshold"])
+
+
+def version_tag(key):
+    # Appended to model versions in cache keys: a new threshold is a new model.
+    threshold = get_threshold(key)
+    return "argmax" if threshold is None else f"t{threshold:g}"
+
+
+def stale_thresholds():
+    # Entries evaluated on a different artifact than the one now served.
+    return {key: entry for key, entry in load_thresholds().items()
+            if entry.get("model_version") != get_model(key).version}
+
+
+def save_threshold(key, entry, path=None):
+    path = path or settings.THRESHOLDS_PATH
+    data = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+    data[key] = entry
+    tmp_path = f"{path}.{os.getpid()}.part"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# ===================== DECISIONS =====================
+def is_positive(key, prediction):
+    # Works on one label or an array of them.
+    return np.isin(prediction, DISEASES[key]["positive_classes"])
+
+
+def positive_proba(key, model, proba):
+    # P(disease): summed over every positive class (kidney has two).
+    return proba[:, is_positive(key, model.classes_)].sum(axis=1)
+
+
+def apply_threshold(key, model, proba, threshold=None):
+    # proba: predict_proba output; returns class labels like model.predict.
+    labels = model.classes_.take(np.argmax(proba, axis=1))
+    threshold = get_threshold(key) if threshold is None else threshold
+    if threshold is None:
+        return labels
+    positive = is_positive(key, model.classes_)
+    detected = positive_proba(key, model, proba) >= threshold
+    # Most likely label on the side of the threshold each row falls on.
+    best_positive = model.classes_.take(np.argmax(np.where(positive, proba, -np.inf), axis=1))
+    best_other = model.classes_.take(np.argmax(np.where(positive, -np.inf, proba), axis=1))
+    return np.where(detected, best_positive, best_other)
+
+
+def predict(key, model, X_scaled):
+    if get_threshold(key) is None or not hasattr(model, "predict_proba"):
+        return model.predict(X_scaled)
+    return apply_threshold(key, model, model.predict_proba(X_scaled))
+
+
+def brain_detected(score, threshold=None):
+    threshold = get_threshold(BRAIN_KEY) if threshold is None else threshold
+    if threshold is None:
+        return score > BRAIN_DEFAULT_THRESHOLD
+    return score >= threshold
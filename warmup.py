@@ -0,0 +1,102 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+
+import inference_service
+import metrics
+import settings
+from diseases import DISEASES
+from model_registry import BRAIN_KEY, get_model
+
+# ===================== WARM-UP =====================
+# Opt-in (MDDS_WARMUP=1, or start the server with `python serve.py`): one
+# background thread loads every model and pushes a dummy request through
+# the inference service, so unpickling, the brain model download, the TF
+# graph build / first-call tracing and the micro-batch threads all happen
+# before the first real user clicks Predict.
+# Readiness: readiness() for the dashboard, GET /ready on MDDS_METRICS_PORT
+# (200 once every model is hot, 503 before) for the load balancer.
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+_status = {}
+_lock = threading.Lock()
+_thread = None
+
+
+def warmup_keys():
+    keys = [k.strip() for k in settings.WARMUP_MODELS.split(",") if k.strip()]
+    return keys or list(DISEASES) + [BRAIN_KEY]
+
+
+def _dummy_inference(key):
+    loaded = get_model(key)
+    if key == BRAIN_KEY:
+        shape = loaded.model.input_shape[1:]
+        inference_service.predict_brain(np.zeros((1,) + tuple(shape), dtype=np.float32))
+    else:
+        # Training mean when the scaler has one, so every tree path is valid.
+        row = getattr(loaded.scaler, "mean_", None)
+        if row is None:
+            row = getattr(loaded.scaler, "offset", np.zeros(len(loaded.features)))
+        inference_service.predict_tabular(key, list(np.asarray(row, dtype=float)))
+
+
+def _set(key, **fields):
+    with _lock:
+        _status[key] = dict(_status.get(key, {}), **fields)
+
+
+def _run(keys):
+    for key in keys:
+        _set(key, state=LOADING)
+        start = time.perf_counter()
+        try:
+            with metrics.stage(key, "warmup"):
+                _dummy_inference(key)
+        except Exception as e:
+            _set(key, state=FAILED, error=str(e), seconds=time.perf_counter() - start)
+        else:
+            _set(key, state=READY, seconds=time.perf_counter() - start)
+
+
+def start_warmup(keys=None):
+    # Idempotent: later calls (every Streamlit rerun) return the same thread.
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return _thread
+        keys = keys or warmup_keys()
+        for key in keys:
+            _status[key] = {"state": PENDING}
+        _thread = threading.Thread(target=_run, args=(keys,), name="model-warmup", daemon=True)
+        _thread.start()
+    metrics.start_http_server()
+    return _thread
+
+
+def readiness():
+    with _lock:
+        return {key: dict(status) for key, status in _status.items()}
+
+
+def is_ready():
+    # No warm-up configured means nothing to wait for.
+    status = readiness()
+    return all(s["state"] == READY for s in status.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load and warm every model, then print readiness.")
+    parser.add_argument("--model", action="append", choices=sorted(DISEASES) + [BRAIN_KEY])
+    args = parser.parse_args(argv)
+
+    start_warmup(args.model).join()
+    for key, status in readiness().items():
+        detail = status.get("error") or f"{status['seconds'] * 1000:.0f} ms"
+        print(f"{'✅' if status['state'] == READY else '❌'} {key:<10} {detail}")
+
+
+if __name__ == "__main__":
+    main()